@@ -1,8 +1,200 @@
+import asyncio
+import collections
+import concurrent.futures
 import logging
+import threading
+import time
 
 import tango
 
 
+class _PoolEntry:
+    __slots__ = ("proxy", "checked_at", "refs")
+
+    def __init__(self, proxy, refs=0):
+        self.proxy = proxy
+        self.checked_at = time.monotonic()
+        self.refs = refs
+
+
+class ProxyPool:
+    """
+    A thread-safe pool of DeviceProxy objects.
+
+    The pool holds at most max_size proxies and evicts the least recently
+    used one when it is full. A proxy last checked more than ttl seconds
+    ago is pinged before being handed out again, however often it is
+    used: if the ping fails the proxy is dropped and a new one is created
+    in its place.
+
+    Proxies can be acquired: an acquired proxy is reference counted and
+    is never evicted until every holder has released it, so the pool can
+    temporarily grow beyond max_size when all its proxies are in use.
+
+    The hits, misses, evictions and reconnects counters can be read
+    through the stats method.
+    """
+
+    DEFAULT_MAX_SIZE = 256
+    DEFAULT_TTL = 30.0
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reconnects = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, create, acquire=False):
+        """
+        Return the proxy stored under key, creating it if needed
+
+        :param key: the pool key (e.g. the device name)
+        :param create: callable with no arguments returning a new proxy
+        :param acquire: if True the reference count of the key is
+            incremented; the caller must call release once done
+
+        :return: DeviceProxy
+        """
+        refs = 0
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if acquire:
+                    entry.refs += 1
+            else:
+                self.misses += 1
+
+        if entry is not None:
+            if time.monotonic() - entry.checked_at < self.ttl:
+                return entry.proxy
+            if self._is_alive(entry.proxy):
+                entry.checked_at = time.monotonic()
+                return entry.proxy
+            self.logger.info("Proxy for %s is not responding", key)
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                # the holders of the dead proxy keep their references
+                refs = entry.refs
+                self.reconnects += 1
+        elif acquire:
+            refs = 1
+
+        # the proxy is created outside the lock: it needs a database
+        # lookup and a network round-trip that must not block other keys
+        proxy = create()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # another thread won the race, keep its proxy
+                self._entries.move_to_end(key)
+                entry.refs += refs
+                return entry.proxy
+            self._entries[key] = _PoolEntry(proxy, refs)
+            self._evict()
+        return proxy
+
+    def configure(self, max_size=None, ttl=None):
+        """
+        Change the size and the ttl of the pool
+
+        The proxies beyond the new size are evicted, the least recently
+        used first, unless they are acquired.
+
+        :param max_size: the new max_size, unchanged if None
+        :param ttl: the new ttl in seconds, unchanged if None
+        """
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl is not None:
+                self.ttl = ttl
+            self._evict()
+
+    def release(self, key):
+        """Decrement the reference count of key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.refs > 0:
+                entry.refs -= 1
+            self._evict()
+
+    def refs(self, key):
+        """Return the reference count of key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return 0 if entry is None else entry.refs
+
+    def discard(self, key):
+        """Remove the proxy stored under key, if any."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every proxy from the pool."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return the pool counters
+
+        :return: dict with size, max_size, referenced, hits, misses,
+            evictions and reconnects
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "referenced": sum(
+                    1 for entry in self._entries.values() if entry.refs
+                ),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "reconnects": self.reconnects,
+            }
+
+    def _evict(self):
+        # must be called with the lock held
+        if len(self._entries) <= self.max_size:
+            return
+        for key in list(self._entries):
+            if self._entries[key].refs == 0:
+                del self._entries[key]
+                self.evictions += 1
+                self.logger.debug("Evicted proxy for %s", key)
+                if len(self._entries) <= self.max_size:
+                    return
+
+    @staticmethod
+    def _is_alive(proxy):
+        try:
+            proxy.ping(green_mode=tango.GreenMode.Synchronous)
+        except tango.DevFailed:
+            return False
+        return True
+
+
 class DevFactory:
     """
     This class is an easy attempt to develop the concept developed by MCCS team
@@ -12,8 +204,22 @@ class DevFactory:
     It is a factory class which provide the ability to create an object of
     type DeviceProxy.
 
+    The proxies are kept in a ProxyPool shared by every DevFactory of the
+    process and keyed by device name and green mode, so that devices
+    hosted in the same server reuse the same connection. Each factory
+    holds a reference on the proxies it handed out until release is
+    called. The size and the ttl of the pool are set with configure_pool.
+
+    A caller always gets a proxy in the green mode it asked for: an
+    Asyncio device is never handed a blocking proxy because somebody else
+    asked for the same device first. Proxies of the same device in
+    different green modes still share the omniORB connection to the
+    device server, so the extra cost is one database lookup. The green
+    mode of a proxy obtained from the factory must not be changed.
+
     When testing the static variable _test_context is an instance of
-    the TANGO class MultiDeviceTestContext.
+    the TANGO class MultiDeviceTestContext, which gives the address of
+    the devices the proxies are built for.
 
     More information on tango testing can be found at the following link:
     https://pytango.readthedocs.io/en/stable/testing.html
@@ -22,10 +228,17 @@ class DevFactory:
 
     _test_context = None
 
+    pool = ProxyPool()
+
+    WARM_UP_WORKERS = 8
+    _executor = None
+    _executor_lock = threading.Lock()
+
     def __init__(self, green_mode=tango.GreenMode.Synchronous):
-        self.dev_proxys = {}
         self.logger = logging.getLogger(__name__)
         self.default_green_mode = green_mode
+        self._keys = set()
+        self._keys_lock = threading.Lock()
 
     def get_device(self, dev_name, green_mode=None):
         """
@@ -40,11 +253,214 @@ class DevFactory:
             green_mode = self.default_green_mode
 
         if DevFactory._test_context is None:
-            if dev_name not in self.dev_proxys:
-                self.logger.info("Creating Proxy for %s", dev_name)
-                self.dev_proxys[dev_name] = tango.DeviceProxy(
-                    dev_name, green_mode=green_mode
-                )
-            return self.dev_proxys[dev_name]
+            dev_access = dev_name
         else:
-            return DevFactory._test_context.get_device(dev_name)
+            # the proxies of the test context are shared and synchronous:
+            # a proxy of its own is built for every green mode instead of
+            # changing the green mode of the shared one
+            dev_access = DevFactory._test_context.get_device_access(dev_name)
+
+        def create():
+            self.logger.info("Creating Proxy for %s", dev_access)
+            return tango.DeviceProxy(dev_access, green_mode=green_mode)
+
+        key = (dev_access.lower(), green_mode)
+        with self._keys_lock:
+            acquire = key not in self._keys
+        proxy = DevFactory.pool.get(key, create, acquire=acquire)
+        if acquire:
+            with self._keys_lock:
+                duplicate = key in self._keys
+                self._keys.add(key)
+            if duplicate:
+                # another thread of this factory acquired it first
+                DevFactory.pool.release(key)
+        return proxy
+
+    def warm_up(self, dev_names, green_mode=None):
+        """
+        Create in parallel the DeviceProxy of many devices
+
+        The proxies are created by a thread pool and stored in the shared
+        pool, so that following get_device calls for the same devices do
+        not pay the database lookup and network round-trip. A failure is
+        not fatal: get_device will try again on first use.
+
+        When testing with a MultiDeviceTestContext there is nothing to
+        cache and no future is created.
+
+        :param dev_names: iterable of device names
+        :param green_mode: tango.GreenMode (the factory default if None)
+
+        :return: dict mapping each device name to an asyncio.Future if
+            green_mode is Asyncio and an event loop is running, to a
+            concurrent.futures.Future otherwise
+        """
+        if DevFactory._test_context is not None:
+            return {}
+
+        if green_mode is None:
+            green_mode = self.default_green_mode
+
+        loop = None
+        if green_mode == tango.GreenMode.Asyncio:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+
+        executor = DevFactory._get_executor()
+        futures = {}
+        for dev_name in dict.fromkeys(dev_names):
+            future = executor.submit(self._create_device, dev_name, green_mode)
+            future.add_done_callback(
+                lambda fut, name=dev_name: self._log_warm_up(name, fut)
+            )
+            if loop is not None:
+                future = asyncio.wrap_future(future, loop=loop)
+                # the failure is already logged: awaiting it is optional
+                future.add_done_callback(self._ignore_exception)
+            futures[dev_name] = future
+        return futures
+
+    def read_attributes(self, dev_attrs, timeout=None):
+        """
+        Read many attributes of many devices in one call
+
+        One read_attributes request is sent to every device without
+        waiting for the replies, which are then collected: the devices
+        are therefore read concurrently and the call lasts as long as the
+        slowest device, whatever the number of devices.
+
+        :param dev_attrs: dict mapping a device name to the list of the
+            attribute names to read
+        :param timeout: reply timeout in milliseconds (the proxy timeout
+            if None)
+
+        :return: dict mapping each device name to a dict of attribute
+            values (None for an attribute that could not be read), or to
+            the tango.DevFailed raised by that device
+        """
+        sync = tango.GreenMode.Synchronous
+        requests = {}
+        results = {}
+        for dev_name, attr_names in dev_attrs.items():
+            try:
+                proxy = self.get_device(dev_name)
+                requests[dev_name] = (
+                    proxy,
+                    proxy.read_attributes_asynch(
+                        list(attr_names), green_mode=sync
+                    ),
+                )
+            except tango.DevFailed as df:
+                results[dev_name] = df
+
+        for dev_name, (proxy, request_id) in requests.items():
+            try:
+                # a reply without timeout does not wait, it only polls
+                replies = proxy.read_attributes_reply(
+                    request_id, self._reply_timeout(proxy, timeout)
+                )
+                results[dev_name] = {
+                    reply.name: reply.value for reply in replies
+                }
+            except tango.DevFailed as df:
+                results[dev_name] = df
+        return {dev_name: results[dev_name] for dev_name in dev_attrs}
+
+    def command_inout(self, dev_cmds, timeout=None):
+        """
+        Execute a command on many devices in one call
+
+        The commands are sent with command_inout_asynch without waiting
+        for the replies, which are then collected: the devices execute
+        their command concurrently and the call lasts as long as the
+        slowest device, whatever the number of devices.
+
+        :param dev_cmds: dict mapping a device name to a (command name,
+            argument) pair, the argument being None for a command without
+            input
+        :param timeout: reply timeout in milliseconds (the proxy timeout
+            if None)
+
+        :return: dict mapping each device name to the value returned by
+            its command, or to the tango.DevFailed raised by that device
+        """
+        requests = {}
+        results = {}
+        for dev_name, (cmd_name, argin) in dev_cmds.items():
+            try:
+                proxy = self.get_device(dev_name)
+                if argin is None:
+                    request_id = proxy.command_inout_asynch(cmd_name)
+                else:
+                    request_id = proxy.command_inout_asynch(cmd_name, argin)
+                requests[dev_name] = (proxy, request_id)
+            except tango.DevFailed as df:
+                results[dev_name] = df
+
+        for dev_name, (proxy, request_id) in requests.items():
+            try:
+                results[dev_name] = proxy.command_inout_reply(
+                    request_id, self._reply_timeout(proxy, timeout)
+                )
+            except tango.DevFailed as df:
+                results[dev_name] = df
+        return {dev_name: results[dev_name] for dev_name in dev_cmds}
+
+    def _create_device(self, dev_name, green_mode):
+        with tango.EnsureOmniThread():
+            return self.get_device(dev_name, green_mode)
+
+    def _log_warm_up(self, dev_name, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.info(
+                "Could not create proxy for %s: %s",
+                dev_name,
+                future.exception(),
+            )
+
+    @staticmethod
+    def _reply_timeout(proxy, timeout):
+        if timeout is None:
+            return proxy.get_timeout_millis()
+        return timeout
+
+    @staticmethod
+    def _ignore_exception(future):
+        if not future.cancelled():
+            future.exception()
+
+    @classmethod
+    def configure_pool(cls, max_size=None, ttl=None):
+        """
+        Change the size and the ttl of the proxy pool shared by every
+        factory of the process
+
+        :param max_size: the most proxies kept, unchanged if None
+        :param ttl: seconds a proxy can stay idle before being pinged
+            again, unchanged if None
+        """
+        cls.pool.configure(max_size=max_size, ttl=ttl)
+
+    @classmethod
+    def _get_executor(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=cls.WARM_UP_WORKERS,
+                    thread_name_prefix="DevFactory",
+                )
+            return cls._executor
+
+    def release(self):
+        """Release the references held on the shared proxies."""
+        with self._keys_lock:
+            keys, self._keys = self._keys, set()
+        for key in keys:
+            DevFactory.pool.release(key)
+
+    def stats(self):
+        """Return the counters of the shared proxy pool."""
+        return DevFactory.pool.stats()
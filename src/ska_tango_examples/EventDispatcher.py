@@ -0,0 +1,64 @@
+import logging
+
+import tango
+
+
+class EventDispatcher:
+    """
+    Route the events of many subscriptions to their own handlers.
+
+    The handler of a subscription is bound to its callback when the
+    subscription is made, so an event reaches its handler without any
+    lookup or comparison of device names, whatever the number of
+    subscriptions.
+
+    Error events are passed to a single error handler, which logs them
+    by default. A handler may be a coroutine function: with the proxies
+    of an Asyncio device the callbacks run in the event loop, which
+    awaits the coroutine returned by the callback.
+    """
+
+    def __init__(self, error_handler=None):
+        self.logger = logging.getLogger(__name__)
+        self.error_handler = error_handler or self.log_error
+
+    def callback(self, handler):
+        """
+        Return the callback of a subscription routed to handler
+
+        :param handler: callable receiving the events without error
+
+        :return: callable to pass to subscribe_event
+        """
+
+        def dispatch(evt):
+            if evt.err:
+                return self.error_handler(evt)
+            return handler(evt)
+
+        return dispatch
+
+    def subscribe(
+        self,
+        proxy,
+        attr_name,
+        handler,
+        event_type=tango.EventType.CHANGE_EVENT,
+        **kwargs,
+    ):
+        """
+        Subscribe to an event of proxy, routed to handler
+
+        The keyword arguments are passed to subscribe_event.
+
+        :return: what subscribe_event returns: the event id, or an
+            awaitable with an Asyncio proxy
+        """
+        return proxy.subscribe_event(
+            attr_name, event_type, self.callback(handler), **kwargs
+        )
+
+    def log_error(self, evt):
+        """Log the first error of an error event."""
+        error = evt.errors[0]
+        self.logger.error("%s %s", error.reason, error.desc)
@@ -0,0 +1,85 @@
+import threading
+
+import numpy
+
+
+class TickStatistics:
+    """
+    Timing statistics of the ticks of a periodic loop.
+
+    For every tick the loop records how late it fired compared with its
+    scheduled time, how long its remote calls took and how long it waited
+    for the device lock. The last size samples of each measure are kept
+    in a fixed-size ring buffer, so that recording a tick costs the same
+    whatever the time the loop has been running, and are summarised in
+    histograms whose buckets are bounded by the edges (in seconds).
+    """
+
+    MEASURES = ("lateness", "rpc", "lock_wait")
+
+    DEFAULT_SIZE = 1024
+
+    DEFAULT_EDGES = (
+        0.001,
+        0.002,
+        0.005,
+        0.01,
+        0.02,
+        0.05,
+        0.1,
+        0.2,
+        0.5,
+        1.0,
+    )
+
+    def __init__(self, size=DEFAULT_SIZE, edges=DEFAULT_EDGES):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.edges = numpy.array(edges, dtype=numpy.float64)
+        self._samples = numpy.zeros(
+            (len(self.MEASURES), size), dtype=numpy.float64
+        )
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return min(self._count, self.size)
+
+    def record(self, lateness, rpc=0.0, lock_wait=0.0):
+        """
+        Record the timing of a tick
+
+        :param lateness: seconds between the scheduled and actual time of
+            the tick (negative if it fired early)
+        :param rpc: seconds spent in remote calls
+        :param lock_wait: seconds spent waiting for the device lock
+        """
+        with self._lock:
+            self._samples[:, self._count % self.size] = (
+                lateness,
+                rpc,
+                lock_wait,
+            )
+            self._count += 1
+
+    def samples(self, measure):
+        """Return the samples of a measure, the oldest first."""
+        row = self.MEASURES.index(measure)
+        with self._lock:
+            if self._count <= self.size:
+                return self._samples[row, : self._count].copy()
+            start = self._count % self.size
+            return numpy.roll(self._samples[row], -start)
+
+    def histogram(self, measure):
+        """
+        Return the histogram of the samples of a measure
+
+        :return: numpy array of len(edges) + 1 counts: the samples up to
+            each edge, then the samples beyond the last one
+        """
+        samples = self.samples(measure)
+        buckets = numpy.searchsorted(self.edges, samples, side="left")
+        return numpy.bincount(buckets, minlength=len(self.edges) + 1)
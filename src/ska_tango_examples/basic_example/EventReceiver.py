@@ -84,7 +84,7 @@ class EventReceiver(Device):
 
     def delete_device(self):
         # PROTECTED REGION ID(EventReceiver.delete_device) ENABLED START #
-        pass
+        self._dev_factory.release()
         # PROTECTED REGION END #    //  EventReceiver.delete_device
 
     # ------------------
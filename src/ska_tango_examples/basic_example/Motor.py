@@ -88,6 +88,7 @@ class Motor(Device):
         destructor and by the device Init command.
         """
         # PROTECTED REGION ID(Motor.delete_device) ENABLED START #
+        self._dev_factory.release()
         # PROTECTED REGION END #    //  Motor.delete_device
 
     # ------------------
@@ -14,31 +14,68 @@
 A simple counter:
 - increment
 - decrement
+- increment by
+- apply a sequence of deltas
 - reset
 """
 
+import asyncio
+import contextlib
+
 # PyTango imports
 from tango import AttrWriteType, DebugIt, GreenMode
 from tango.server import Device, attribute, command, run
 
 # Additional import
 # PROTECTED REGION ID(Counter.additionnal_import) ENABLED START #
+from ska_tango_examples.counter.AtomicCounter import (
+    AtomicCounter,
+    OverflowMode,
+)
+from ska_tango_examples.counter.ThresholdEvents import ThresholdEvents
 
 # PROTECTED REGION END #    //  Counter.additionnal_import
 
 __all__ = ["AsyncCounter", "main"]
 
 
-class AsyncCounter(Device):
+class AsyncCounter(ThresholdEvents, Device):
     """
     This Device demonstrate the use of the TANGO event mechanism
     to send change events to clients.
     There's also a device attribute in polling so that events
     for that attribute are sent automatically.
+    The value is updated atomically and its behaviour on overflow
+    (wrap around or saturate) is set by the overflow_mode attribute.
+    Besides fire_event_at, any number of thresholds and ranges can be
+    watched: a single change event is pushed by each step of an update
+    that crosses one or more of them, and crossed_thresholds tells which
+    ones.
+    The commands never push events themselves: they queue them for a
+    publisher task, so that a burst of commands does not wait on the
+    serialisation of the events. The events queued while the publisher
+    is busy are pushed together, in order, each with the value and the
+    levels of its own crossing.
     """
 
     # PROTECTED REGION ID(Counter.class_variable) ENABLED START #
     green_mode = GreenMode.Asyncio
+
+    def _fire_event(self, value, crossed):
+        self._events.put_nowait((value, crossed))
+
+    async def _publish_events(self):
+        # the commands and the publisher run on the same event loop: the
+        # queued events are pushed as a batch without yielding to them, and
+        # none is dropped, so that every crossing reaches the clients
+        while True:
+            batch = [await self._events.get()]
+            while not self._events.empty():
+                batch.append(self._events.get_nowait())
+            for value, crossed in batch:
+                self._crossed_thresholds = crossed
+                self.push_change_event("value", value)
+
     # PROTECTED REGION END #    //  Counter.class_variable
 
     # ----------
@@ -54,12 +91,36 @@ class AsyncCounter(Device):
         access=AttrWriteType.READ_WRITE,
     )
 
+    thresholds = attribute(
+        dtype=("DevShort",),
+        access=AttrWriteType.READ_WRITE,
+        max_dim_x=1024,
+    )
+
+    threshold_ranges = attribute(
+        dtype=("DevShort",),
+        access=AttrWriteType.READ_WRITE,
+        max_dim_x=2048,
+        doc="Pairs of (low, high) inclusive bounds",
+    )
+
+    crossed_thresholds = attribute(
+        dtype=("DevShort",),
+        max_dim_x=2048,
+        doc="Levels crossed by the update of the last event published",
+    )
+
     polled_value = attribute(
         dtype="DevShort",
         period=100,
         abs_change=1,
     )
 
+    overflow_mode = attribute(
+        dtype=OverflowMode,
+        access=AttrWriteType.READ_WRITE,
+    )
+
     # ---------------
     # General methods
     # ---------------
@@ -68,10 +129,16 @@ class AsyncCounter(Device):
         """Initialises the attributes and properties of the Counter."""
         await Device.init_device(self)
         # PROTECTED REGION ID(Counter.init_device) ENABLED START #
-        self._value = 0
+        self._counter = AtomicCounter()
         self._fire_event_at = 0
+        self._thresholds = []
+        self._threshold_ranges = []
+        self._crossed_thresholds = []
+        self._update_threshold_index()
         self.set_change_event("value", True, False)
         self.set_change_event("polled_value", True, True)
+        self._events = asyncio.Queue()
+        self._publisher = asyncio.create_task(self._publish_events())
         # PROTECTED REGION END #    //  Counter.init_device
 
     def always_executed_hook(self):
@@ -79,7 +146,7 @@ class AsyncCounter(Device):
         # PROTECTED REGION ID(Counter.always_executed_hook) ENABLED START #
         # PROTECTED REGION END #    //  Counter.always_executed_hook
 
-    def delete_device(self):
+    async def delete_device(self):
         """Hook to delete resources allocated in init_device.
 
         This method allows for any memory or other resources allocated in the
@@ -87,6 +154,9 @@ class AsyncCounter(Device):
         destructor and by the device Init command.
         """
         # PROTECTED REGION ID(Counter.delete_device) ENABLED START #
+        self._publisher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._publisher
         # PROTECTED REGION END #    //  Counter.delete_device
 
     # ------------------
@@ -96,7 +166,7 @@ class AsyncCounter(Device):
     def read_value(self):
         # PROTECTED REGION ID(Counter.value_read) ENABLED START #
         """Return the value attribute."""
-        return self._value
+        return self._counter.value
         # PROTECTED REGION END #    //  Counter.value_read
 
     def read_fire_event_at(self):
@@ -109,14 +179,65 @@ class AsyncCounter(Device):
         # PROTECTED REGION ID(Counter.fire_event_at_write) ENABLED START #
         """Set the fire_event_at attribute."""
         self._fire_event_at = value
+        self._update_threshold_index()
         # PROTECTED REGION END #    //  Counter.fire_event_at_write
 
+    def read_thresholds(self):
+        # PROTECTED REGION ID(Counter.thresholds_read) ENABLED START #
+        """Return the thresholds attribute."""
+        return self._thresholds
+        # PROTECTED REGION END #    //  Counter.thresholds_read
+
+    def write_thresholds(self, value):
+        # PROTECTED REGION ID(Counter.thresholds_write) ENABLED START #
+        """Set the thresholds attribute."""
+        self._thresholds = sorted({int(threshold) for threshold in value})
+        self._update_threshold_index()
+        # PROTECTED REGION END #    //  Counter.thresholds_write
+
+    def read_threshold_ranges(self):
+        # PROTECTED REGION ID(Counter.threshold_ranges_read) ENABLED START #
+        """Return the threshold_ranges attribute."""
+        return [bound for pair in self._threshold_ranges for bound in pair]
+        # PROTECTED REGION END #    //  Counter.threshold_ranges_read
+
+    def write_threshold_ranges(self, value):
+        # PROTECTED REGION ID(Counter.threshold_ranges_write) ENABLED START #
+        """Set the threshold_ranges attribute."""
+        if len(value) % 2:
+            raise ValueError("ranges must be given as (low, high) pairs")
+        bounds = [int(bound) for bound in value]
+        ranges = list(zip(bounds[::2], bounds[1::2]))
+        if any(low > high for low, high in ranges):
+            raise ValueError("the low bound of a range exceeds the high one")
+        self._threshold_ranges = ranges
+        self._update_threshold_index()
+        # PROTECTED REGION END #    //  Counter.threshold_ranges_write
+
+    def read_crossed_thresholds(self):
+        # PROTECTED REGION ID(Counter.crossed_thresholds_read) ENABLED START #
+        """Return the crossed_thresholds attribute."""
+        return self._crossed_thresholds
+        # PROTECTED REGION END #    //  Counter.crossed_thresholds_read
+
     def read_polled_value(self):
         # PROTECTED REGION ID(Counter.polled_value_read) ENABLED START #
         """Return the polled_value attribute."""
-        return self._value
+        return self._counter.value
         # PROTECTED REGION END #    //  Counter.polled_value_read
 
+    def read_overflow_mode(self):
+        # PROTECTED REGION ID(Counter.overflow_mode_read) ENABLED START #
+        """Return the overflow_mode attribute."""
+        return self._counter.overflow_mode
+        # PROTECTED REGION END #    //  Counter.overflow_mode_read
+
+    def write_overflow_mode(self, value):
+        # PROTECTED REGION ID(Counter.overflow_mode_write) ENABLED START #
+        """Set the overflow_mode attribute."""
+        self._counter.overflow_mode = OverflowMode(value)
+        # PROTECTED REGION END #    //  Counter.overflow_mode_write
+
     # --------
     # Commands
     # --------
@@ -125,42 +246,82 @@ class AsyncCounter(Device):
         dtype_out="DevShort",
     )
     @DebugIt()
-    def increment(self):
+    async def increment(self):
         # PROTECTED REGION ID(Counter.increment) ENABLED START #
         """
         Increment the value of the counter by 1
 
         :return:'DevShort'
         """
-        self._value += 1
-        if self._value == self._fire_event_at:
-            self.push_change_event("value", self._value)
-        return self._value
+        old, value = self._counter.add(1)
+        self._fire_crossings(old, [1], [value])
+        return value
         # PROTECTED REGION END #    //  Counter.increment
 
     @command(
         dtype_out="DevShort",
     )
     @DebugIt()
-    def decrement(self):
+    async def decrement(self):
         # PROTECTED REGION ID(Counter.decrement) ENABLED START #
         """
         Decrement the value of the counter by 1
 
         :return:'DevShort'
         """
-        self._value -= 1
-        if self._value == self._fire_event_at:
-            self.push_change_event("value", self._value)
-        return self._value
+        old, value = self._counter.add(-1)
+        self._fire_crossings(old, [-1], [value])
+        return value
         # PROTECTED REGION END #    //  Counter.decrement
 
+    @command(
+        dtype_in="DevLong",
+        dtype_out="DevShort",
+    )
+    @DebugIt()
+    async def IncrementBy(self, argin):
+        # PROTECTED REGION ID(Counter.IncrementBy) ENABLED START #
+        """
+        Increment the value of the counter by the input parameter
+
+        :param argin: 'DevLong' the (possibly negative) increment
+
+        :return:'DevShort'
+        """
+        old, value = self._counter.add(argin)
+        self._fire_crossings(old, [argin], [value])
+        return value
+        # PROTECTED REGION END #    //  Counter.IncrementBy
+
+    @command(
+        dtype_in="DevVarLongArray",
+        dtype_out="DevVarShortArray",
+    )
+    @DebugIt()
+    async def ApplyDeltas(self, argin):
+        # PROTECTED REGION ID(Counter.ApplyDeltas) ENABLED START #
+        """
+        Add each delta of the input array to the counter, in order
+
+        A change event is published by every step crossing fire_event_at or
+        any of the watched thresholds and ranges, with the value reached
+        by that step.
+
+        :param argin: 'DevVarLongArray' the deltas to apply
+
+        :return:'DevVarShortArray' the value after each delta
+        """
+        old, values = self._counter.add_many(argin)
+        self._fire_crossings(old, argin, values)
+        return values
+        # PROTECTED REGION END #    //  Counter.ApplyDeltas
+
     @command(
         dtype_in="DevShort",
         dtype_out="DevShort",
     )
     @DebugIt()
-    def CounterReset(self, argin):
+    async def CounterReset(self, argin):
         # PROTECTED REGION ID(Counter.CounterReset) ENABLED START #
         """
         Reset the counter to the input parameter
@@ -169,10 +330,9 @@ class AsyncCounter(Device):
 
         :return:'DevShort'
         """
-        self._value = argin
-        if self._value == self._fire_event_at:
-            self.push_change_event("value", self._value)
-        return self._value
+        _, value = self._counter.set(argin)
+        self._fire_reset(value)
+        return value
         # PROTECTED REGION END #    //  Counter.CounterReset
 
 
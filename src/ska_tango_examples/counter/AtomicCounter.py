@@ -0,0 +1,82 @@
+import enum
+import threading
+
+
+class OverflowMode(enum.IntEnum):
+    """Python enumerated type for overflow_mode attribute."""
+
+    WRAP = 0
+    SATURATE = 1
+
+
+class AtomicCounter:
+    """
+    A thread-safe counter holding a DevShort value.
+
+    Every update is a read-modify-write done under a lock, so that
+    concurrent commands never lose an update whatever the serialization
+    model of the device server. When an update goes beyond the DevShort
+    range the value either wraps around (two's complement, as a C short
+    would do) or saturates at the limit, depending on overflow_mode.
+    """
+
+    MIN_VALUE = -(2**15)
+    MAX_VALUE = 2**15 - 1
+
+    def __init__(self, value=0, overflow_mode=OverflowMode.WRAP):
+        self._lock = threading.Lock()
+        self.overflow_mode = OverflowMode(overflow_mode)
+        self._value = self._bound(value)
+
+    @property
+    def value(self):
+        return self._value
+
+    def add(self, delta):
+        """
+        Add delta to the counter
+
+        :param delta: the (possibly negative) increment
+
+        :return: tuple (old value, new value)
+        """
+        with self._lock:
+            old = self._value
+            self._value = self._bound(old + delta)
+            return old, self._value
+
+    def add_many(self, deltas):
+        """
+        Add every delta of a sequence to the counter in one atomic step
+
+        :param deltas: sequence of (possibly negative) increments
+
+        :return: tuple (old value, list of the values after each delta)
+        """
+        with self._lock:
+            old = value = self._value
+            values = []
+            for delta in deltas:
+                value = self._bound(value + delta)
+                values.append(value)
+            self._value = value
+            return old, values
+
+    def set(self, value):
+        """
+        Set the counter to value
+
+        :return: tuple (old value, new value)
+        """
+        with self._lock:
+            old = self._value
+            self._value = self._bound(value)
+            return old, self._value
+
+    def _bound(self, value):
+        if self.MIN_VALUE <= value <= self.MAX_VALUE:
+            return value
+        if self.overflow_mode == OverflowMode.SATURATE:
+            return max(self.MIN_VALUE, min(self.MAX_VALUE, value))
+        span = self.MAX_VALUE - self.MIN_VALUE + 1
+        return (value - self.MIN_VALUE) % span + self.MIN_VALUE
@@ -0,0 +1,33 @@
+from ska_tango_examples.counter.ThresholdIndex import ThresholdIndex
+
+
+class ThresholdEvents:
+    """
+    The threshold events shared by the Counter and the AsyncCounter.
+
+    fire_event_at and the watched thresholds and ranges are kept in a
+    ThresholdIndex. Every step of an update that crosses one or more of
+    them fires a single change event with the value reached by that
+    step. The device sends the event in _fire_event: the Counter pushes
+    it at once, the AsyncCounter queues it for its publisher.
+    """
+
+    def _update_threshold_index(self):
+        self._threshold_index = ThresholdIndex(
+            [self._fire_event_at] + self._thresholds,
+            self._threshold_ranges,
+        )
+
+    def _fire_crossings(self, old, deltas, values):
+        for value, crossed in self._threshold_index.crossed_by_deltas(
+            old, deltas, values
+        ):
+            self._fire_event(value, crossed)
+
+    def _fire_reset(self, value):
+        # a reset does not cross anything, but landing on a level counts
+        if self._threshold_index.on_level(value):
+            self._fire_event(value, [value])
+
+    def _fire_event(self, value, crossed):
+        raise NotImplementedError
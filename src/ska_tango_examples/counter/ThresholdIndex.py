@@ -0,0 +1,88 @@
+import bisect
+
+
+class ThresholdIndex:
+    """
+    A sorted index of the levels watched on a counter.
+
+    A level is either a single threshold or an inclusive range
+    (low, high). A threshold is crossed when it lies between the old
+    value (excluded) and the new value (included). A range is crossed
+    when the value enters or leaves it.
+
+    Every level is turned into boundary points kept in two sorted lists,
+    one for each direction of the movement, so that the levels crossed by
+    an update are found with a bisection in O(log n + k), where k is the
+    number of crossed levels.
+    """
+
+    def __init__(self, thresholds=(), ranges=()):
+        self.thresholds = sorted(set(thresholds))
+        self.ranges = sorted(set(ranges))
+        for low, high in self.ranges:
+            if low > high:
+                raise ValueError(f"invalid range ({low}, {high})")
+
+        # (point, reported level) for increasing and decreasing values
+        up = [(threshold, threshold) for threshold in self.thresholds]
+        down = list(up)
+        for low, high in self.ranges:
+            # entering or leaving a range from below
+            up.append((low, low))
+            up.append((high + 1, high))
+            # entering or leaving a range from above
+            down.append((high, high))
+            down.append((low - 1, low))
+        up.sort()
+        down.sort()
+        self._up_points = [point for point, _ in up]
+        self._up_levels = [level for _, level in up]
+        self._down_points = [point for point, _ in down]
+        self._down_levels = [level for _, level in down]
+        self._levels = sorted(set(self.thresholds).union(*self.ranges))
+
+    def __len__(self):
+        return len(self.thresholds) + len(self.ranges)
+
+    def crossed(self, old, new):
+        """
+        Return the levels crossed going from old to new
+
+        :return: list of the crossed thresholds and range bounds, in the
+            order they are crossed
+        """
+        if new > old:
+            start = bisect.bisect_right(self._up_points, old)
+            end = bisect.bisect_right(self._up_points, new)
+            return self._up_levels[start:end]
+        if new < old:
+            start = bisect.bisect_left(self._down_points, new)
+            end = bisect.bisect_left(self._down_points, old)
+            return self._down_levels[start:end][::-1]
+        return []
+
+    def crossed_by_deltas(self, old, deltas, values):
+        """
+        Return the steps of a sequence of deltas that cross a level
+
+        :param old: the value before the first delta
+        :param deltas: the deltas, applied in order
+        :param values: the value after each delta, wrapped or saturated
+
+        :return: list of (value, crossed levels) pairs, one for each
+            step crossing a level, in order
+        """
+        steps = []
+        for delta, value in zip(deltas, values):
+            # old + delta is the unbounded result of the step, so that
+            # wrapping around does not look like crossing the whole range
+            crossed = self.crossed(old, old + delta)
+            if crossed:
+                steps.append((value, crossed))
+            old = value
+        return steps
+
+    def on_level(self, value):
+        """Tell if value is a threshold or a range bound."""
+        index = bisect.bisect_left(self._levels, value)
+        return index < len(self._levels) and self._levels[index] == value
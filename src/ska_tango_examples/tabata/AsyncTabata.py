@@ -16,12 +16,12 @@ Tabata training
 """
 
 import asyncio
+import contextlib
 import logging
 
-# PyTango imports
-import threading
-
 import debugpy
+
+# PyTango imports
 import tango
 from tango import AttrWriteType, DebugIt, DevState, GreenMode
 from tango.server import Device, attribute, command, device_property, run
@@ -29,6 +29,7 @@ from tango.server import Device, attribute, command, device_property, run
 # Additional import
 # PROTECTED REGION ID(AsyncTabata.additionnal_import) ENABLED START #
 from ska_tango_examples.DevFactory import DevFactory
+from ska_tango_examples.EventDispatcher import EventDispatcher
 from ska_tango_examples.tabata.RunningState import RunningState
 
 logging.basicConfig(level=logging.DEBUG)
@@ -42,7 +43,9 @@ class AsyncTabata(Device):
     Tabata training
 
     This class demonstrate how to create an async device in TANGO
-    with synchronization (lock) effort to protect the device
+    with synchronization (lock) effort to protect the device.
+    The workout runs as a background task of the event loop: Run
+    returns as soon as the task is created and Stop cancels it.
 
     **Properties:**
 
@@ -57,84 +60,94 @@ class AsyncTabata(Device):
             - Type:'DevString'
         tabatasCounter
             - Type:'DevString'
+        sleep_time
+            - Type:'DevFloat'
     """
 
     # PROTECTED REGION ID(AsyncTabata.class_variable) ENABLED START #
     green_mode = GreenMode.Asyncio
 
-    def event_subscription(self):
-        self._dev_factory.get_device(self.prepCounter).subscribe_event(
-            "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
-            stateless=True,
-        )
-        self._dev_factory.get_device(self.workCounter).subscribe_event(
-            "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
-            stateless=True,
-        )
-        self._dev_factory.get_device(self.restCounter).subscribe_event(
-            "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
-            stateless=True,
-        )
-        self._dev_factory.get_device(self.cycleCounter).subscribe_event(
-            "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
-            stateless=True,
-        )
-        self._dev_factory.get_device(self.tabatasCounter).subscribe_event(
-            "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
-            stateless=True,
+    def counters(self):
+        return [
+            self.prepCounter,
+            self.workCounter,
+            self.restCounter,
+            self.cycleCounter,
+            self.tabatasCounter,
+        ]
+
+    def transitions(self):
+        return {
+            self.prepCounter: self.end_prepare,
+            self.workCounter: self.end_work,
+            self.restCounter: self.end_rest,
+            self.cycleCounter: self.end_cycle,
+            self.tabatasCounter: self.end_workout,
+        }
+
+    async def event_subscription(self):
+        # the proxies are in Asyncio mode: the subscriptions are made
+        # concurrently and the callbacks are run by the event loop
+        await asyncio.gather(
+            *(
+                self._dispatcher.subscribe(
+                    self._dev_factory.get_device(counter),
+                    "value",
+                    self.on_zero(transition),
+                    stateless=True,
+                )
+                for counter, transition in self.transitions().items()
+            )
         )
 
-    def handle_event(self, evt):
-        if evt.err:
-            error = evt.errors[0]
-            self.logger.error("%s %s", error.reason, error.desc)
-            return
-
-        if evt.attr_value.value == 0 and self.get_state() == DevState.ON:
-            self.logger.debug(
-                "HANDLE EVENT %s %s",
-                evt.device.dev_name(),
-                evt.attr_value.value,
-            )
-            if evt.device.dev_name() == self.prepCounter:
-                self.logger.debug("PREPARE -> WORK")
-                with self._lock:
-                    evt.device.CounterReset(self._prepare)
-                    self._running_state = RunningState.WORK
-            if evt.device.dev_name() == self.workCounter:
-                self.logger.debug("WORK -> REST")
-                with self._lock:
-                    evt.device.CounterReset(self._work)
-                    self._running_state = RunningState.REST
-            if evt.device.dev_name() == self.restCounter:
-                self.logger.debug("REST -> WORK")
-                with self._lock:
-                    evt.device.CounterReset(self._rest)
-                    self._running_state = RunningState.WORK
-                    self._dev_factory.get_device(self.cycleCounter).decrement()
-            if evt.device.dev_name() == self.cycleCounter:
-                self.logger.debug("TABATA DONE")
-                with self._lock:
-                    evt.device.CounterReset(self._cycles)
-                    self._dev_factory.get_device(
-                        self.tabatasCounter
-                    ).decrement()
-            if evt.device.dev_name() == self.tabatasCounter:
-                self.logger.debug("WORKOUT DONE")
-                with self._lock:
-                    self.set_state(DevState.OFF)
-                    self._running_state = RunningState.PREPARE
-                self.logger.debug("State set at %s", self.get_state())
+    def on_zero(self, transition):
+        # a phase ends when its counter reaches zero during the workout
+        async def handle_event(evt):
+            if evt.attr_value.value == 0 and self.get_state() == DevState.ON:
+                self.logger.debug(
+                    "HANDLE EVENT %s %s",
+                    evt.device.dev_name(),
+                    evt.attr_value.value,
+                )
+                await transition()
+
+        return handle_event
+
+    async def end_prepare(self):
+        self.logger.debug("PREPARE -> WORK")
+        device = self._dev_factory.get_device(self.prepCounter)
+        async with self._lock:
+            await device.CounterReset(self._prepare)
+            self._running_state = RunningState.WORK
+
+    async def end_work(self):
+        self.logger.debug("WORK -> REST")
+        device = self._dev_factory.get_device(self.workCounter)
+        async with self._lock:
+            await device.CounterReset(self._work)
+            self._running_state = RunningState.REST
+
+    async def end_rest(self):
+        self.logger.debug("REST -> WORK")
+        device = self._dev_factory.get_device(self.restCounter)
+        async with self._lock:
+            await device.CounterReset(self._rest)
+            self._running_state = RunningState.WORK
+            await self._dev_factory.get_device(self.cycleCounter).decrement()
+
+    async def end_cycle(self):
+        self.logger.debug("TABATA DONE")
+        device = self._dev_factory.get_device(self.cycleCounter)
+        async with self._lock:
+            await device.CounterReset(self._cycles)
+            await self._dev_factory.get_device(self.tabatasCounter).decrement()
+
+    async def end_workout(self):
+        self.logger.debug("WORKOUT DONE")
+        async with self._lock:
+            self.set_state(DevState.OFF)
+            self._running_state = RunningState.PREPARE
+        self.logger.debug("State set at %s", self.get_state())
 
     async def internal_run(self):
         while self.get_state() == DevState.ON:
@@ -142,20 +155,32 @@ class AsyncTabata(Device):
             run_state = await self.read_running_state()
             if run_state == RunningState.PREPARE:
                 device = self._dev_factory.get_device(self.prepCounter)
-                self.logger.debug("PREPARE %s", device.value)
-                with self._lock:
-                    device.decrement()
+                async with self._lock:
+                    value = await device.decrement()
+                    self.logger.debug("PREPARE %s", value)
             if run_state == RunningState.WORK:
                 device = self._dev_factory.get_device(self.workCounter)
-                self.logger.debug("WORK %s", device.value)
-                with self._lock:
-                    device.decrement()
+                async with self._lock:
+                    value = await device.decrement()
+                    self.logger.debug("WORK %s", value)
             if run_state == RunningState.REST:
                 device = self._dev_factory.get_device(self.restCounter)
-                self.logger.debug("REST %s", device.value)
-                with self._lock:
-                    device.decrement()
-            await asyncio.sleep(1)
+                async with self._lock:
+                    value = await device.decrement()
+                    self.logger.debug("REST %s", value)
+            await asyncio.sleep(self.sleep_time)
+
+    def run_done(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error("Workout failed: %s", task.exception())
+            self.set_state(DevState.FAULT)
+
+    async def cancel_run(self):
+        if self._run_task is not None:
+            self._run_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._run_task
+            self._run_task = None
 
     def is_Run_allowed(self):
         return self.get_state() == tango.DevState.OFF
@@ -166,22 +191,20 @@ class AsyncTabata(Device):
     def is_ResetCounters_allowed(self):
         return self.get_state() == tango.DevState.OFF
 
-    def internal_reset_counters(self):
-        with self._lock:
-            self._dev_factory.get_device(self.prepCounter).CounterReset(
-                self._prepare
-            )
-            self._dev_factory.get_device(self.workCounter).CounterReset(
-                self._work
-            )
-            self._dev_factory.get_device(self.restCounter).CounterReset(
-                self._rest
-            )
-            self._dev_factory.get_device(self.cycleCounter).CounterReset(
-                self._cycles
-            )
-            self._dev_factory.get_device(self.tabatasCounter).CounterReset(
-                self._tabatas
+    async def internal_reset_counters(self):
+        values = [
+            self._prepare,
+            self._work,
+            self._rest,
+            self._cycles,
+            self._tabatas,
+        ]
+        async with self._lock:
+            await asyncio.gather(
+                *(
+                    self._dev_factory.get_device(counter).CounterReset(value)
+                    for counter, value in zip(self.counters(), values)
+                )
             )
 
     # PROTECTED REGION END #    //  AsyncTabata.class_variable
@@ -210,6 +233,8 @@ class AsyncTabata(Device):
         dtype="DevString", default_value="test/counter/tabatas"
     )
 
+    sleep_time = device_property(dtype="DevFloat", default_value=1)
+
     # ----------
     # Attributes
     # ----------
@@ -252,8 +277,13 @@ class AsyncTabata(Device):
         await Device.init_device(self)
         # PROTECTED REGION ID(AsyncTabata.init_device) ENABLED START #
         self.logger = logging.getLogger(__name__)
-        self._lock = threading.Lock()
-        self._dev_factory = DevFactory()
+        self._lock = asyncio.Lock()
+        self._run_task = None
+        # proxies in Asyncio mode, so that no call blocks the event loop
+        self._dev_factory = DevFactory(green_mode=GreenMode.Asyncio)
+        self._dispatcher = EventDispatcher()
+        # resolve the counters together instead of one by one on first use
+        self._dev_factory.warm_up(self.counters())
         self._prepare = 10
         self._work = 20
         self._rest = 10
@@ -269,16 +299,16 @@ class AsyncTabata(Device):
         # util.set_serial_model(tango.SerialModel.NO_SYNC)
         # PROTECTED REGION END #    //  AsyncTabata.init_device
 
-    def always_executed_hook(self):
+    async def always_executed_hook(self):
         """Method always executed before any TANGO command is executed."""
         # PROTECTED REGION ID(AsyncTabata.always_executed_hook) ENABLED START #
         if not self.subscribed:
-            self.event_subscription()
+            await self.event_subscription()
             self.subscribed = True
-            self.internal_reset_counters()
+            await self.internal_reset_counters()
         # PROTECTED REGION END #    //  AsyncTabata.always_executed_hook
 
-    def delete_device(self):
+    async def delete_device(self):
         """Hook to delete resources allocated in init_device.
 
         This method allows for any memory or other resources allocated in the
@@ -286,6 +316,8 @@ class AsyncTabata(Device):
         destructor and by the device Init command.
         """
         # PROTECTED REGION ID(AsyncTabata.delete_device) ENABLED START #
+        await self.cancel_run()
+        self._dev_factory.release()
         # PROTECTED REGION END #    //  AsyncTabata.delete_device
 
     # ------------------
@@ -298,7 +330,7 @@ class AsyncTabata(Device):
         return self._prepare
         # PROTECTED REGION END #    //  AsyncTabata.prepare_read
 
-    def write_prepare(self, value):
+    async def write_prepare(self, value):
         # PROTECTED REGION ID(AsyncTabata.prepare_write) ENABLED START #
         """Set the prepare attribute."""
         if value < 0:
@@ -307,7 +339,7 @@ class AsyncTabata(Device):
         if self.get_state() == DevState.ON:
             raise Exception("cannot change values when device is running!")
 
-        with self._lock:
+        async with self._lock:
             self._prepare = value
         # PROTECTED REGION END #    //  AsyncTabata.prepare_write
 
@@ -317,7 +349,7 @@ class AsyncTabata(Device):
         return self._work
         # PROTECTED REGION END #    //  AsyncTabata.work_read
 
-    def write_work(self, value):
+    async def write_work(self, value):
         # PROTECTED REGION ID(AsyncTabata.work_write) ENABLED START #
         """Set the work attribute."""
         if value < 1:
@@ -326,7 +358,7 @@ class AsyncTabata(Device):
         if self.get_state() == DevState.ON:
             raise Exception("cannot change values when device is running!")
 
-        with self._lock:
+        async with self._lock:
             self._work = value
         # PROTECTED REGION END #    //  AsyncTabata.work_write
 
@@ -336,7 +368,7 @@ class AsyncTabata(Device):
         return self._rest
         # PROTECTED REGION END #    //  AsyncTabata.rest_read
 
-    def write_rest(self, value):
+    async def write_rest(self, value):
         # PROTECTED REGION ID(AsyncTabata.rest_write) ENABLED START #
         """Set the rest attribute."""
         if value < 1:
@@ -345,7 +377,7 @@ class AsyncTabata(Device):
         if self.get_state() == DevState.ON:
             raise Exception("cannot change values when device is running!")
 
-        with self._lock:
+        async with self._lock:
             self._rest = value
         # PROTECTED REGION END #    //  AsyncTabata.rest_write
 
@@ -355,7 +387,7 @@ class AsyncTabata(Device):
         return self._cycles
         # PROTECTED REGION END #    //  AsyncTabata.cycles_read
 
-    def write_cycles(self, value):
+    async def write_cycles(self, value):
         # PROTECTED REGION ID(AsyncTabata.cycles_write) ENABLED START #
         """Set the cycles attribute."""
         if value < 1:
@@ -364,7 +396,7 @@ class AsyncTabata(Device):
         if self.get_state() == DevState.ON:
             raise Exception("cannot change values when device is running!")
 
-        with self._lock:
+        async with self._lock:
             self._cycles = value
         # PROTECTED REGION END #    //  AsyncTabata.cycles_write
 
@@ -374,7 +406,7 @@ class AsyncTabata(Device):
         return self._tabatas
         # PROTECTED REGION END #    //  AsyncTabata.tabatas_read
 
-    def write_tabatas(self, value):
+    async def write_tabatas(self, value):
         # PROTECTED REGION ID(AsyncTabata.tabatas_write) ENABLED START #
         """Set the tabatas attribute."""
         if value < 1:
@@ -383,7 +415,7 @@ class AsyncTabata(Device):
         if self.get_state() == DevState.ON:
             raise Exception("cannot change values when device is running!")
 
-        with self._lock:
+        async with self._lock:
             self._tabatas = value
         # PROTECTED REGION END #    //  AsyncTabata.tabatas_write
 
@@ -405,34 +437,37 @@ class AsyncTabata(Device):
 
         :return:None
         """
-        with self._lock:
+        async with self._lock:
+            # the loop of a finished workout may still be sleeping: it is
+            # cancelled, so that a single loop decrements the counters
+            await self.cancel_run()
             self.set_state(DevState.ON)
-        await self.internal_run()
-        # loop = asyncio.get_event_loop()
-        # loop.create_task(self.internal_run())
+            self._run_task = asyncio.create_task(self.internal_run())
+            self._run_task.add_done_callback(self.run_done)
         # PROTECTED REGION END #    //  AsyncTabata.Run
 
     @command()
     @DebugIt()
-    def Stop(self):
+    async def Stop(self):
         # PROTECTED REGION ID(AsyncTabata.Stop) ENABLED START #
         """
 
         :return:None
         """
-        with self._lock:
+        await self.cancel_run()
+        async with self._lock:
             self.set_state(DevState.OFF)
         # PROTECTED REGION END #    //  AsyncTabata.Stop
 
     @command()
     @DebugIt()
-    def ResetCounters(self):
+    async def ResetCounters(self):
         # PROTECTED REGION ID(AsyncTabata.ResetCounters) ENABLED START #
         """
 
         :return:None
         """
-        self.internal_reset_counters()
+        await self.internal_reset_counters()
         # PROTECTED REGION END #    //  AsyncTabata.ResetCounters
 
 
@@ -0,0 +1,227 @@
+import json
+
+import numpy
+
+from ska_tango_examples.tabata.RunningState import RunningState
+
+MAX_PHASES = 32768
+
+PHASE_COUNTERS = {
+    RunningState.PREPARE: "prepare",
+    RunningState.WORK: "work",
+    RunningState.REST: "rest",
+}
+
+
+class IntervalProgram:
+    """
+    An interval workout compiled into a compact schedule.
+
+    A program is a sequence of phases, each one a RunningState held for a
+    number of ticks, and of blocks repeating a sequence of their own,
+    nested as deep as needed. For example a Tabata is::
+
+        {"phases": [
+            {"state": "PREPARE", "duration": 10},
+            {"repeat": 8, "phases": [
+                {"state": "WORK", "duration": 20},
+                {"state": "REST", "duration": 10}
+            ]}
+        ]}
+
+    The repeats are unrolled when the program is compiled, into arrays
+    holding the RunningState and the start tick of every phase, so that
+    the phase at any tick is found with a bisection. A phase of zero
+    ticks is dropped.
+    """
+
+    def __init__(self, phases, durations):
+        phases = numpy.asarray(phases, dtype=numpy.int16)
+        durations = numpy.asarray(durations, dtype=numpy.int64)
+        kept = durations > 0
+        self.phases = phases[kept]
+        self.durations = durations[kept]
+        if len(self.phases) == 0:
+            raise ValueError("a program needs at least one phase")
+        if len(self.phases) > MAX_PHASES:
+            raise ValueError(
+                f"a program cannot have more than {MAX_PHASES} phases"
+            )
+        ends = numpy.cumsum(self.durations)
+        self.starts = ends - self.durations
+        self.total_ticks = int(ends[-1])
+
+    @classmethod
+    def from_json(cls, text):
+        """Compile a program from its JSON representation."""
+        try:
+            program = json.loads(text)
+        except json.JSONDecodeError as error:
+            raise ValueError(f"invalid program: {error}") from error
+        if isinstance(program, dict):
+            program = program.get("phases")
+        phases, durations = _compile(program, 0)
+        return cls(phases, durations)
+
+    @classmethod
+    def tabata(cls, prepare, work, rest, cycles, tabatas):
+        """Compile the program of a classic Tabata workout."""
+        repeats = cycles * tabatas
+        if 1 + 2 * repeats > MAX_PHASES:
+            raise ValueError(
+                f"a program cannot have more than {MAX_PHASES} phases"
+            )
+        phases = [RunningState.PREPARE] + [
+            RunningState.WORK,
+            RunningState.REST,
+        ] * repeats
+        durations = [prepare] + [work, rest] * repeats
+        return cls(phases, durations)
+
+    def __len__(self):
+        return len(self.phases)
+
+    @property
+    def timeline(self):
+        """
+        Return the timeline of the program
+
+        :return: numpy array of shape (phases, 2) holding the RunningState
+            and the start tick of every phase, in order
+        """
+        return numpy.column_stack((self.phases, self.starts))
+
+    def index_at(self, ticks):
+        """Return the index of the phase running after ticks."""
+        return int(numpy.searchsorted(self.starts, ticks, side="right")) - 1
+
+    def phase_at(self, ticks):
+        """
+        Return the RunningState after a number of ticks
+
+        :param ticks: the ticks elapsed since the start of the program
+
+        :return: RunningState (PREPARE once the program is over)
+        """
+        if ticks < 0 or ticks >= self.total_ticks:
+            return RunningState.PREPARE
+        return RunningState(int(self.phases[self.index_at(ticks)]))
+
+
+def _compile(phases, depth):
+    # return the states and durations of a list of phases, unrolled
+    if not isinstance(phases, list):
+        raise ValueError("the phases of a program must be a list")
+    if depth > 16:
+        raise ValueError("the blocks of a program are nested too deep")
+    states = []
+    durations = []
+    for phase in phases:
+        if not isinstance(phase, dict):
+            raise ValueError(f"invalid phase {phase!r}")
+        if "repeat" in phase:
+            repeat = phase["repeat"]
+            if not isinstance(repeat, int) or repeat < 1:
+                raise ValueError(f"invalid repeat {repeat!r}")
+            block_states, block_durations = _compile(
+                phase.get("phases"), depth + 1
+            )
+            if len(block_states) * repeat > MAX_PHASES:
+                raise ValueError(
+                    f"a program cannot have more than {MAX_PHASES} phases"
+                )
+            states.extend(block_states * repeat)
+            durations.extend(block_durations * repeat)
+        else:
+            state = phase.get("state")
+            duration = phase.get("duration")
+            if state not in RunningState.__members__:
+                raise ValueError(f"invalid state {state!r}")
+            if not isinstance(duration, int) or duration < 0:
+                raise ValueError(f"invalid duration {duration!r}")
+            states.append(RunningState[state])
+            durations.append(duration)
+        if len(states) > MAX_PHASES:
+            raise ValueError(
+                f"a program cannot have more than {MAX_PHASES} phases"
+            )
+    return states, durations
+
+
+class ProgramStateMachine:
+    """
+    The execution of an IntervalProgram, run in-process.
+
+    The machine has the interface of the TabataStateMachine, so that the
+    Tabata device runs either of them. A program has no cycles nor
+    tabatas: the counter of the RunningState of the current phase counts
+    down the ticks left in that phase, and is set to zero when the phase
+    ends.
+    """
+
+    COUNTERS = ("prepare", "work", "rest")
+
+    def __init__(self, program):
+        self.program = program
+        self.reset()
+
+    def reset(self):
+        """Go back to the start of the program."""
+        self.ticks = 0
+        self.done = False
+        self._index = 0
+        self.values = dict.fromkeys(self.COUNTERS, 0)
+        self.values[self._counter()] = int(self.program.durations[0])
+        self.running_state = RunningState(int(self.program.phases[0]))
+
+    @property
+    def total_ticks(self):
+        """Return the number of ticks of the whole program."""
+        return self.program.total_ticks
+
+    @property
+    def timeline(self):
+        """Return the timeline of the program."""
+        return self.program.timeline
+
+    def phase_at(self, ticks):
+        """Return the RunningState after a number of ticks."""
+        return self.program.phase_at(ticks)
+
+    def remaining_ticks(self, ticks=None):
+        """Return the ticks left to the end of the program."""
+        if ticks is None:
+            ticks = self.ticks
+        return max(self.total_ticks - ticks, 0)
+
+    def tick(self):
+        """
+        Advance the program by one tick
+
+        :return: dict mapping the name of every changed counter to its new
+            value (empty once the program is done)
+        """
+        if self.done:
+            return {}
+        self.ticks += 1
+        counter = self._counter()
+        self.values[counter] -= 1
+        changed = {counter}
+        if self.values[counter] <= 0:
+            self._index += 1
+            if self._index == len(self.program):
+                self.done = True
+                self.running_state = RunningState.PREPARE
+            else:
+                self.running_state = RunningState(
+                    int(self.program.phases[self._index])
+                )
+                counter = self._counter()
+                self.values[counter] = int(self.program.durations[self._index])
+                changed.add(counter)
+        return {name: self.values[name] for name in changed}
+
+    def _counter(self):
+        return PHASE_COUNTERS[
+            RunningState(int(self.program.phases[self._index]))
+        ]
@@ -19,6 +19,7 @@ import threading
 import time
 
 import debugpy
+import numpy
 
 # PyTango imports
 import tango
@@ -28,7 +29,14 @@ from tango.server import Device, attribute, command, device_property, run
 # Additional import
 # PROTECTED REGION ID(Tabata.additionnal_import) ENABLED START #
 from ska_tango_examples.DevFactory import DevFactory
+from ska_tango_examples.tabata.IntervalProgram import (
+    MAX_PHASES,
+    IntervalProgram,
+    ProgramStateMachine,
+)
 from ska_tango_examples.tabata.RunningState import RunningState
+from ska_tango_examples.tabata.TabataStateMachine import TabataStateMachine
+from ska_tango_examples.TickStatistics import TickStatistics
 
 logging.basicConfig(level=logging.DEBUG)
 # PROTECTED REGION END #    //  Tabata.additionnal_import
@@ -44,6 +52,14 @@ class Tabata(Device):
     with default synchronization.
     When the command Start is called, a specific thread will
     work so that commands are free to be called.
+    The phases of the workout are computed in-process by a state
+    machine ticking at fixed deadlines, and the counters only mirror
+    its values. The whole workout is exposed as a timeline of phases,
+    together with the time left to its end.
+    Instead of the Tabata, the device can run an interval program with
+    any sequence of phases, written in JSON to the program attribute.
+    The counters are optional: a counter property left empty is not
+    mirrored.
 
     **Properties:**
 
@@ -63,120 +79,98 @@ class Tabata(Device):
     """
 
     # PROTECTED REGION ID(Tabata.class_variable) ENABLED START #
-    def event_subscription(self):
-        self._dev_factory.get_device(self.prepCounter).subscribe_event(
-            "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
-            stateless=True,
-        )
-        self._dev_factory.get_device(self.workCounter).subscribe_event(
-            "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
-            stateless=True,
-        )
-        self._dev_factory.get_device(self.restCounter).subscribe_event(
-            "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
-            stateless=True,
-        )
-        self._dev_factory.get_device(self.cycleCounter).subscribe_event(
-            "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
-            stateless=True,
-        )
-        self._dev_factory.get_device(self.tabatasCounter).subscribe_event(
-            "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
-            stateless=True,
+    def counter_names(self):
+        # the counters only mirror the workout: an empty name disables one
+        names = {
+            "prepare": self.prepCounter,
+            "work": self.workCounter,
+            "rest": self.restCounter,
+            "cycles": self.cycleCounter,
+            "tabatas": self.tabatasCounter,
+        }
+        return {
+            counter: name for counter, name in names.items() if name.strip()
+        }
+
+    def make_machine(self):
+        if self._program is not None:
+            return ProgramStateMachine(self._program)
+        return TabataStateMachine(
+            self._prepare,
+            self._work,
+            self._rest,
+            self._cycles,
+            self._tabatas,
         )
 
     def step_loop(self):
+        # every deadline is computed from the start time, so that the time
+        # spent updating the counters never adds up into a drift
         with tango.EnsureOmniThread():
-            while self.get_state() == DevState.ON:
-                with self._lock:
-                    if self.read_running_state() == RunningState.PREPARE:
-                        device = self._dev_factory.get_device(self.prepCounter)
-                        self.logger.debug("PREPARE %s", device.value)
-                        device.decrement()
-                    if self.read_running_state() == RunningState.WORK:
-                        device = self._dev_factory.get_device(self.workCounter)
-                        self.logger.debug("WORK %s", device.value)
-                        device.decrement()
-                    if self.read_running_state() == RunningState.REST:
-                        device = self._dev_factory.get_device(self.restCounter)
-                        self.logger.debug("REST %s", device.value)
-                        device.decrement()
-
-                time.sleep(self.sleep_time)
-
-    def handle_event(self, evt):
-        if evt.err:
-            error = evt.errors[0]
-            self.logger.error("%s %s", error.reason, error.desc)
-            return
-
-        if evt.attr_value.value == 0 and self.get_state() == DevState.ON:
-            self.logger.debug(
-                "HANDLE EVENT %s %s",
-                evt.device.dev_name(),
-                evt.attr_value.value,
-            )
-            if evt.device.dev_name() == self.prepCounter:
-                with self._lock:
-                    evt.device.CounterReset(self._prepare)
-                    self._running_state = RunningState.WORK
-                self.logger.debug("PREPARE -> WORK")
-
-            if evt.device.dev_name() == self.workCounter:
-                with self._lock:
-                    evt.device.CounterReset(self._work)
-                    self._running_state = RunningState.REST
-                self.logger.debug("WORK -> REST")
-
-            if evt.device.dev_name() == self.restCounter:
-                with self._lock:
-                    evt.device.CounterReset(self._rest)
-                    self._running_state = RunningState.WORK
-                    self._dev_factory.get_device(self.cycleCounter).decrement()
-                self.logger.debug("REST -> WORK")
-
-            if evt.device.dev_name() == self.cycleCounter:
-                with self._lock:
-                    evt.device.CounterReset(self._cycles)
-                    self._dev_factory.get_device(
-                        self.tabatasCounter
-                    ).decrement()
-                self.logger.debug("TABATA DONE")
-
-            if evt.device.dev_name() == self.tabatasCounter:
+            start = time.monotonic()
+            with self._lock:
+                self._started = (start, self._machine.ticks)
+            ticks = 0
+            while True:
+                ticks += 1
+                scheduled = start + ticks * self.sleep_time
+                if self._stop.wait(max(scheduled - time.monotonic(), 0)):
+                    break
+                fired = time.monotonic()
                 with self._lock:
-                    self._running_state = RunningState.PREPARE
+                    locked = time.monotonic()
+                    updates = self._machine.tick()
+                    done = self._machine.done
+                self.logger.debug(
+                    "%s %s", self._machine.running_state.name, updates
+                )
+                calling = time.monotonic()
+                self.update_counters(updates)
+                self._tick_statistics.record(
+                    fired - scheduled,
+                    time.monotonic() - calling,
+                    locked - fired,
+                )
+                if done:
                     self.set_state(DevState.OFF)
-                self.logger.debug("WORKOUT DONE")
+                    self.logger.debug("WORKOUT DONE")
+                    break
+            with self._lock:
+                self._started = None
+
+    def time_left(self):
+        # while running, the time left is counted from the start time of
+        # the loop rather than from the last tick
+        with self._lock:
+            if self._started is None:
+                return self._machine.remaining_ticks() * self.sleep_time
+            start, ticks = self._started
+            remaining = self._machine.remaining_ticks(ticks) * self.sleep_time
+        return max(remaining - (time.monotonic() - start), 0.0)
+
+    def update_counters(self, updates):
+        # the counters are reset concurrently: the update lasts one
+        # round-trip, however many counters changed
+        names = self.counter_names()
+        results = self._dev_factory.command_inout(
+            {
+                names[counter]: ("CounterReset", value)
+                for counter, value in updates.items()
+                if counter in names
+            }
+        )
+        for dev_name, result in results.items():
+            if isinstance(result, tango.DevFailed):
+                # the counters only mirror the state machine
+                self.logger.error("Cannot update %s: %s", dev_name, result)
+        return results
 
     def internal_reset_counters(self):
         with self._lock:
-            self._running_state = RunningState.PREPARE
-            self._dev_factory.get_device(self.prepCounter).CounterReset(
-                self._prepare
-            )
-            self._dev_factory.get_device(self.workCounter).CounterReset(
-                self._work
-            )
-            self._dev_factory.get_device(self.restCounter).CounterReset(
-                self._rest
-            )
-            self._dev_factory.get_device(self.cycleCounter).CounterReset(
-                self._cycles
-            )
-            self._dev_factory.get_device(self.tabatasCounter).CounterReset(
-                self._tabatas
-            )
+            self._machine = self.make_machine()
+            self._workout_changed = False
+            values = dict(self._machine.values)
+        return self.update_counters(values)
 
     def is_Start_allowed(self):
         return self.get_state() == tango.DevState.OFF
@@ -248,6 +242,59 @@ class Tabata(Device):
         dtype=RunningState,
     )
 
+    program = attribute(
+        dtype="DevString",
+        access=AttrWriteType.READ_WRITE,
+        doc="JSON interval program run instead of the Tabata defined by "
+        "the other attributes (empty for none)",
+    )
+
+    timeline = attribute(
+        dtype=("DevLong",),
+        max_dim_x=2 * MAX_PHASES,
+        doc="Pairs of (running state, start tick) of the phases of the "
+        f"workout (a workout of more than {MAX_PHASES} phases cannot be "
+        "read)",
+    )
+
+    remaining_time = attribute(
+        dtype="DevDouble",
+        unit="s",
+    )
+
+    tick_lateness = attribute(
+        dtype=("DevDouble",),
+        max_dim_x=TickStatistics.DEFAULT_SIZE,
+        unit="s",
+        doc="Delay of the last ticks after their scheduled time, the oldest "
+        "first",
+    )
+
+    tick_edges = attribute(
+        dtype=("DevDouble",),
+        max_dim_x=len(TickStatistics.DEFAULT_EDGES),
+        unit="s",
+        doc="Upper bounds of the buckets of the tick histograms",
+    )
+
+    tick_lateness_histogram = attribute(
+        dtype=("DevLong",),
+        max_dim_x=len(TickStatistics.DEFAULT_EDGES) + 1,
+        doc="Number of the last ticks by delay after their scheduled time",
+    )
+
+    tick_rpc_histogram = attribute(
+        dtype=("DevLong",),
+        max_dim_x=len(TickStatistics.DEFAULT_EDGES) + 1,
+        doc="Number of the last ticks by time spent updating the counters",
+    )
+
+    tick_lock_wait_histogram = attribute(
+        dtype=("DevLong",),
+        max_dim_x=len(TickStatistics.DEFAULT_EDGES) + 1,
+        doc="Number of the last ticks by time spent waiting for the lock",
+    )
+
     # ---------------
     # General methods
     # ---------------
@@ -259,13 +306,21 @@ class Tabata(Device):
         self.logger = logging.getLogger(__name__)
         self._lock = threading.Lock()
         self._dev_factory = DevFactory()
+        # resolve the counters together instead of one by one on first use
+        self._dev_factory.warm_up(self.counter_names().values())
         self._prepare = 10
         self._work = 20
         self._rest = 10
         self._cycles = 8
         self._tabatas = 1
-        self._running_state = RunningState.PREPARE
-        self.subscribed = False
+        self._program = None
+        self._program_text = ""
+        self._machine = self.make_machine()
+        self._workout_changed = False
+        self._stop = threading.Event()
+        self._started = None
+        self._tick_statistics = TickStatistics()
+        self.counters_initialised = False
         self.set_state(DevState.OFF)
         self.worker_thread = None
         # PROTECTED REGION END #    //  Tabata.init_device
@@ -273,9 +328,8 @@ class Tabata(Device):
     def always_executed_hook(self):
         """Method always executed before any TANGO command is executed."""
         # PROTECTED REGION ID(Tabata.always_executed_hook) ENABLED START #
-        if not self.subscribed:
-            self.event_subscription()
-            self.subscribed = True
+        if not self.counters_initialised:
+            self.counters_initialised = True
             self.internal_reset_counters()
         # PROTECTED REGION END #    //  Tabata.always_executed_hook
 
@@ -287,6 +341,11 @@ class Tabata(Device):
         destructor and by the device Init command.
         """
         # PROTECTED REGION ID(Tabata.delete_device) ENABLED START #
+        # the worker thread must not outlive the device
+        if self.worker_thread is not None and self.worker_thread.is_alive():
+            self._stop.set()
+            self.worker_thread.join()
+        self._dev_factory.release()
         # PROTECTED REGION END #    //  Tabata.delete_device
 
     # ------------------
@@ -309,6 +368,7 @@ class Tabata(Device):
             raise Exception("cannot change values when device is running!")
 
         self._prepare = value
+        self._workout_changed = True
         # PROTECTED REGION END #    //  Tabata.prepare_write
 
     def read_work(self):
@@ -327,6 +387,7 @@ class Tabata(Device):
             raise Exception("cannot change values when device is running!")
 
         self._work = value
+        self._workout_changed = True
         # PROTECTED REGION END #    //  Tabata.work_write
 
     def read_rest(self):
@@ -345,6 +406,7 @@ class Tabata(Device):
             raise Exception("cannot change values when device is running!")
 
         self._rest = value
+        self._workout_changed = True
         # PROTECTED REGION END #    //  Tabata.rest_write
 
     def read_cycles(self):
@@ -363,6 +425,7 @@ class Tabata(Device):
             raise Exception("cannot change values when device is running!")
 
         self._cycles = value
+        self._workout_changed = True
         # PROTECTED REGION END #    //  Tabata.cycles_write
 
     def read_tabatas(self):
@@ -381,14 +444,75 @@ class Tabata(Device):
             raise Exception("cannot change values when device is running!")
 
         self._tabatas = value
+        self._workout_changed = True
         # PROTECTED REGION END #    //  Tabata.tabatas_write
 
     def read_running_state(self):
         # PROTECTED REGION ID(Tabata.running_state_read) ENABLED START #
         """Return the running_state attribute."""
-        return self._running_state
+        return self._machine.running_state
         # PROTECTED REGION END #    //  Tabata.running_state_read
 
+    def read_program(self):
+        # PROTECTED REGION ID(Tabata.program_read) ENABLED START #
+        """Return the program attribute."""
+        return self._program_text
+        # PROTECTED REGION END #    //  Tabata.program_read
+
+    def write_program(self, value):
+        # PROTECTED REGION ID(Tabata.program_write) ENABLED START #
+        """Set the program attribute."""
+        if self.get_state() == DevState.ON:
+            raise Exception("cannot change values when device is running!")
+
+        program = IntervalProgram.from_json(value) if value.strip() else None
+        self._program = program
+        self._program_text = value
+        self._workout_changed = True
+        # PROTECTED REGION END #    //  Tabata.program_write
+
+    def read_timeline(self):
+        # PROTECTED REGION ID(Tabata.timeline_read) ENABLED START #
+        """Return the timeline attribute."""
+        return self._machine.timeline.ravel().astype(numpy.int32)
+        # PROTECTED REGION END #    //  Tabata.timeline_read
+
+    def read_remaining_time(self):
+        # PROTECTED REGION ID(Tabata.remaining_time_read) ENABLED START #
+        """Return the remaining_time attribute."""
+        return self.time_left()
+        # PROTECTED REGION END #    //  Tabata.remaining_time_read
+
+    def read_tick_lateness(self):
+        # PROTECTED REGION ID(Tabata.tick_lateness_read) ENABLED START #
+        """Return the tick_lateness attribute."""
+        return self._tick_statistics.samples("lateness")
+        # PROTECTED REGION END #    //  Tabata.tick_lateness_read
+
+    def read_tick_edges(self):
+        # PROTECTED REGION ID(Tabata.tick_edges_read) ENABLED START #
+        """Return the tick_edges attribute."""
+        return self._tick_statistics.edges
+        # PROTECTED REGION END #    //  Tabata.tick_edges_read
+
+    def read_tick_lateness_histogram(self):
+        # PROTECTED REGION ID(Tabata.tick_lateness_histogram_read) ENABLED START #
+        """Return the tick_lateness_histogram attribute."""
+        return self._tick_statistics.histogram("lateness").astype(numpy.int32)
+        # PROTECTED REGION END #    //  Tabata.tick_lateness_histogram_read
+
+    def read_tick_rpc_histogram(self):
+        # PROTECTED REGION ID(Tabata.tick_rpc_histogram_read) ENABLED START #
+        """Return the tick_rpc_histogram attribute."""
+        return self._tick_statistics.histogram("rpc").astype(numpy.int32)
+        # PROTECTED REGION END #    //  Tabata.tick_rpc_histogram_read
+
+    def read_tick_lock_wait_histogram(self):
+        # PROTECTED REGION ID(Tabata.tick_lock_wait_histogram_read) ENABLED START #
+        """Return the tick_lock_wait_histogram attribute."""
+        return self._tick_statistics.histogram("lock_wait").astype(numpy.int32)
+        # PROTECTED REGION END #    //  Tabata.tick_lock_wait_histogram_read
+
     # --------
     # Commands
     # --------
@@ -401,6 +525,10 @@ class Tabata(Device):
 
         :return:None
         """
+        # the workout starts again once done or once it has been changed
+        if self._machine.done or self._workout_changed:
+            self.internal_reset_counters()
+        self._stop.clear()
         self.set_state(DevState.ON)
         self.worker_thread = threading.Thread(target=self.step_loop)
         self.worker_thread.start()
@@ -414,8 +542,9 @@ class Tabata(Device):
 
         :return:None
         """
-        self.set_state(DevState.OFF)
+        self._stop.set()
         self.worker_thread.join()
+        self.set_state(DevState.OFF)
         # PROTECTED REGION END #    //  Tabata.Stop
 
     @command()
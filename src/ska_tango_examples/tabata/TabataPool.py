@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the TabataPool project
+#
+# SKA
+# INAF
+#
+# Distributed under the terms of the GPL license.
+# See LICENSE.txt for more info.
+
+""" ska-tango-examples
+
+Many Tabata trainings hosted by one device
+"""
+
+import logging
+import threading
+import time
+
+import numpy
+
+# PyTango imports
+import tango
+from tango import DebugIt, DevState
+from tango.server import Device, attribute, command, device_property, run
+
+# Additional import
+# PROTECTED REGION ID(TabataPool.additionnal_import) ENABLED START #
+from ska_tango_examples.tabata.TabataSessions import TabataSessions
+from ska_tango_examples.tabata.TimerWheel import TimerWheel
+
+# PROTECTED REGION END #    //  TabataPool.additionnal_import
+
+__all__ = ["TabataPool", "main"]
+
+
+class TabataPool(Device):
+    """
+    Many Tabata trainings hosted by one device
+
+    Each session is an independent workout, identified by the ID returned
+    by AddSession and started, stopped or reset by ID. The state of the
+    sessions is held in compact arrays and a single thread drives all of
+    them with a hierarchical timer wheel, so that neither a thread nor
+    Counter devices are needed per session.
+
+    A session ticks every sleep_time seconds from the time it is started;
+    the wheel turns every wheel_resolution seconds. At most max_sessions
+    sessions, up to 65536, are hosted.
+
+    **Properties:**
+
+    - Device Property
+        sleep_time
+            - Type:'DevFloat'
+        wheel_resolution
+            - Type:'DevFloat'
+        max_sessions
+            - Type:'DevLong'
+    """
+
+    # PROTECTED REGION ID(TabataPool.class_variable) ENABLED START #
+    # the spectrum attributes hold one element per session
+    MAX_SESSIONS = 65536
+
+    def wheel_loop(self):
+        # wheel tick n is due at start + n * wheel_resolution, so that the
+        # time spent ticking the sessions never adds up into a drift
+        with tango.EnsureOmniThread():
+            while not self._stop.is_set():
+                with self._lock:
+                    idle = len(self._wheel) == 0
+                    next_tick = self._wheel.now + 1
+                if idle:
+                    self._wakeup.wait()
+                    self._wakeup.clear()
+                    continue
+                timeout = self._tick_time(next_tick) - time.monotonic()
+                if self._stop.wait(max(timeout, 0)):
+                    break
+                with self._lock:
+                    self.tick_sessions(self._current_tick())
+
+    def tick_sessions(self, now):
+        # must be called with the lock held
+        expired = self._wheel.advance(now)
+        if not expired:
+            return
+        expired = numpy.array(expired, dtype=numpy.intp)
+        finished = self._sessions.tick(expired)
+        running = expired[self._sessions.running[expired]]
+        self._deadlines[running] += self._period
+        for session in running:
+            self._wheel.schedule(int(session), int(self._deadlines[session]))
+        for session in finished:
+            self.logger.debug("SESSION %d DONE", session)
+        if len(finished) and not self._sessions.running.any():
+            self.set_state(DevState.OFF)
+
+    def _tick_time(self, tick):
+        return self._start_time + tick * self.wheel_resolution
+
+    def _current_tick(self):
+        return int(
+            (time.monotonic() - self._start_time) / self.wheel_resolution
+        )
+
+    def _update_state(self):
+        if self._sessions.running.any():
+            self.set_state(DevState.ON)
+        else:
+            self.set_state(DevState.OFF)
+
+    # PROTECTED REGION END #    //  TabataPool.class_variable
+
+    # -----------------
+    # Device Properties
+    # -----------------
+
+    sleep_time = device_property(dtype="DevFloat", default_value=1)
+
+    wheel_resolution = device_property(dtype="DevFloat", default_value=0.01)
+
+    max_sessions = device_property(dtype="DevLong", default_value=4096)
+
+    # ----------
+    # Attributes
+    # ----------
+
+    sessions = attribute(
+        dtype="DevLong",
+    )
+
+    running_sessions = attribute(
+        dtype="DevLong",
+    )
+
+    session_ids = attribute(
+        dtype=("DevLong",),
+        max_dim_x=MAX_SESSIONS,
+    )
+
+    running_states = attribute(
+        dtype=("DevShort",),
+        max_dim_x=MAX_SESSIONS,
+        doc="RunningState of every session, in the order of session_ids",
+    )
+
+    # ---------------
+    # General methods
+    # ---------------
+
+    def init_device(self):
+        """Initialises the attributes and properties of the TabataPool."""
+        Device.init_device(self)
+        # PROTECTED REGION ID(TabataPool.init_device) ENABLED START #
+        self.logger = logging.getLogger(__name__)
+        if not 1 <= self.max_sessions <= self.MAX_SESSIONS:
+            raise ValueError(
+                f"max_sessions must be between 1 and {self.MAX_SESSIONS}, "
+                f"not {self.max_sessions}"
+            )
+        self._lock = threading.Lock()
+        self._sessions = TabataSessions(self.max_sessions)
+        self._deadlines = numpy.zeros(self.max_sessions, dtype=numpy.int64)
+        self._wheel = TimerWheel()
+        self._period = max(1, round(self.sleep_time / self.wheel_resolution))
+        self._start_time = time.monotonic()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self.set_state(DevState.OFF)
+        self.worker_thread = threading.Thread(target=self.wheel_loop)
+        self.worker_thread.start()
+        # PROTECTED REGION END #    //  TabataPool.init_device
+
+    def always_executed_hook(self):
+        """Method always executed before any TANGO command is executed."""
+        # PROTECTED REGION ID(TabataPool.always_executed_hook) ENABLED START #
+        # PROTECTED REGION END #    //  TabataPool.always_executed_hook
+
+    def delete_device(self):
+        """Hook to delete resources allocated in init_device.
+
+        This method allows for any memory or other resources allocated in the
+        init_device method to be released.  This method is called by the device
+        destructor and by the device Init command.
+        """
+        # PROTECTED REGION ID(TabataPool.delete_device) ENABLED START #
+        self._stop.set()
+        self._wakeup.set()
+        self.worker_thread.join()
+        # PROTECTED REGION END #    //  TabataPool.delete_device
+
+    # ------------------
+    # Attributes methods
+    # ------------------
+
+    def read_sessions(self):
+        # PROTECTED REGION ID(TabataPool.sessions_read) ENABLED START #
+        """Return the sessions attribute."""
+        return len(self._sessions)
+        # PROTECTED REGION END #    //  TabataPool.sessions_read
+
+    def read_running_sessions(self):
+        # PROTECTED REGION ID(TabataPool.running_sessions_read) ENABLED START #
+        """Return the running_sessions attribute."""
+        return int(numpy.count_nonzero(self._sessions.running))
+        # PROTECTED REGION END #    //  TabataPool.running_sessions_read
+
+    def read_session_ids(self):
+        # PROTECTED REGION ID(TabataPool.session_ids_read) ENABLED START #
+        """Return the session_ids attribute."""
+        return self._sessions.ids().astype(numpy.int32)
+        # PROTECTED REGION END #    //  TabataPool.session_ids_read
+
+    def read_running_states(self):
+        # PROTECTED REGION ID(TabataPool.running_states_read) ENABLED START #
+        """Return the running_states attribute."""
+        with self._lock:
+            ids = self._sessions.ids()
+            return self._sessions.running_state[ids].astype(numpy.int16)
+        # PROTECTED REGION END #    //  TabataPool.running_states_read
+
+    # --------
+    # Commands
+    # --------
+
+    @command(
+        dtype_in="DevVarLongArray",
+        doc_in="prepare, work, rest, cycles and tabatas of the session",
+        dtype_out="DevLong",
+        doc_out="the session ID",
+    )
+    @DebugIt()
+    def AddSession(self, argin):
+        # PROTECTED REGION ID(TabataPool.AddSession) ENABLED START #
+        """
+        Create a new session, ready to start
+
+        :param argin: 'DevVarLongArray'
+
+        :return:'DevLong'
+        """
+        with self._lock:
+            return self._sessions.add([int(value) for value in argin])
+        # PROTECTED REGION END #    //  TabataPool.AddSession
+
+    @command(
+        dtype_in="DevLong",
+    )
+    @DebugIt()
+    def RemoveSession(self, argin):
+        # PROTECTED REGION ID(TabataPool.RemoveSession) ENABLED START #
+        """
+        Remove a session
+
+        :param argin: 'DevLong' the session ID
+
+        :return:None
+        """
+        with self._lock:
+            self._sessions.remove(argin)
+            self._wheel.cancel(argin)
+            self._update_state()
+        # PROTECTED REGION END #    //  TabataPool.RemoveSession
+
+    @command(
+        dtype_in="DevLong",
+    )
+    @DebugIt()
+    def StartSession(self, argin):
+        # PROTECTED REGION ID(TabataPool.StartSession) ENABLED START #
+        """
+        Start (or resume) a session
+
+        :param argin: 'DevLong' the session ID
+
+        :return:None
+        """
+        with self._lock:
+            self._sessions.check(argin)
+            if self._sessions.running[argin]:
+                raise ValueError(f"session {argin} is already running")
+            if self._sessions.done[argin]:
+                self._sessions.reset(argin)
+            now = self._current_tick()
+            if not len(self._wheel):
+                # the wheel does not turn while idle
+                self._wheel.advance(now)
+            self._sessions.running[argin] = True
+            self._deadlines[argin] = now + self._period
+            self._wheel.schedule(argin, int(self._deadlines[argin]))
+            self._update_state()
+        self._wakeup.set()
+        # PROTECTED REGION END #    //  TabataPool.StartSession
+
+    @command(
+        dtype_in="DevLong",
+    )
+    @DebugIt()
+    def StopSession(self, argin):
+        # PROTECTED REGION ID(TabataPool.StopSession) ENABLED START #
+        """
+        Stop a session, which can be resumed with StartSession
+
+        :param argin: 'DevLong' the session ID
+
+        :return:None
+        """
+        with self._lock:
+            self._sessions.check(argin)
+            self._sessions.running[argin] = False
+            self._wheel.cancel(argin)
+            self._update_state()
+        # PROTECTED REGION END #    //  TabataPool.StopSession
+
+    @command(
+        dtype_in="DevLong",
+    )
+    @DebugIt()
+    def ResetSession(self, argin):
+        # PROTECTED REGION ID(TabataPool.ResetSession) ENABLED START #
+        """
+        Stop a session and put its counters back to their initial values
+
+        :param argin: 'DevLong' the session ID
+
+        :return:None
+        """
+        with self._lock:
+            self._sessions.check(argin)
+            self._sessions.reset(argin)
+            self._wheel.cancel(argin)
+            self._update_state()
+        # PROTECTED REGION END #    //  TabataPool.ResetSession
+
+    @command(
+        dtype_in="DevLong",
+        dtype_out="DevVarLongArray",
+        doc_out="running state, running flag, then the prepare, work, "
+        "rest, cycles and tabatas counters",
+    )
+    @DebugIt()
+    def GetSession(self, argin):
+        # PROTECTED REGION ID(TabataPool.GetSession) ENABLED START #
+        """
+        Return the state of a session
+
+        :param argin: 'DevLong' the session ID
+
+        :return:'DevVarLongArray'
+        """
+        with self._lock:
+            self._sessions.check(argin)
+            return [
+                int(self._sessions.running_state[argin]),
+                int(self._sessions.running[argin]),
+                *(int(value) for value in self._sessions.values[argin]),
+            ]
+        # PROTECTED REGION END #    //  TabataPool.GetSession
+
+
+# ----------
+# Run server
+# ----------
+
+
+def main(args=None, **kwargs):
+    """Main function of the TabataPool module."""
+    # PROTECTED REGION ID(TabataPool.main) ENABLED START #
+    return run((TabataPool,), args=args, **kwargs)
+    # PROTECTED REGION END #    //  TabataPool.main
+
+
+if __name__ == "__main__":
+    main()
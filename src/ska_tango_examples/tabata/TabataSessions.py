@@ -0,0 +1,114 @@
+import numpy
+
+from ska_tango_examples.tabata.RunningState import RunningState
+from ska_tango_examples.tabata.TabataStateMachine import TabataStateMachine
+
+PREPARE, WORK, REST, CYCLES, TABATAS = range(5)
+
+
+class TabataSessions:
+    """
+    The state of many Tabata workouts, held in compact arrays.
+
+    Every session is a row of the arrays, and its index is the session ID.
+    The phase logic is the one of the TabataStateMachine, applied with
+    numpy to all the sessions ticking at the same time. The column of the
+    counter of the current phase is the value of the RunningState.
+    """
+
+    def __init__(self, max_sessions):
+        self.max_sessions = max_sessions
+        shape = (max_sessions, len(TabataStateMachine.COUNTERS))
+        self.config = numpy.zeros(shape, dtype=numpy.int32)
+        self.values = numpy.zeros(shape, dtype=numpy.int32)
+        self.running_state = numpy.zeros(max_sessions, dtype=numpy.int8)
+        self.allocated = numpy.zeros(max_sessions, dtype=bool)
+        self.running = numpy.zeros(max_sessions, dtype=bool)
+        self.done = numpy.zeros(max_sessions, dtype=bool)
+        # free IDs, the lowest first
+        self._free = list(range(max_sessions - 1, -1, -1))
+
+    def __len__(self):
+        return self.max_sessions - len(self._free)
+
+    def add(self, config):
+        """
+        Allocate a session
+
+        :param config: sequence of prepare, work, rest, cycles and tabatas
+
+        :return: the session ID
+        """
+        if len(config) != len(TabataStateMachine.COUNTERS):
+            raise ValueError(
+                "a session is configured with "
+                + ", ".join(TabataStateMachine.COUNTERS)
+            )
+        if config[PREPARE] < 0 or min(config[WORK:]) < 1:
+            raise ValueError("only positive value!")
+        if not self._free:
+            raise ValueError("no more sessions available")
+        session = self._free.pop()
+        self.allocated[session] = True
+        self.config[session] = config
+        self.reset(session)
+        return session
+
+    def remove(self, session):
+        """Free a session."""
+        self.check(session)
+        self.allocated[session] = False
+        self.running[session] = False
+        self._free.append(session)
+        self._free.sort(reverse=True)
+
+    def reset(self, session):
+        """Put the counters of a session back to their configured values."""
+        self.values[session] = self.config[session]
+        self.running_state[session] = (
+            RunningState.PREPARE
+            if self.config[session, PREPARE] > 0
+            else RunningState.WORK
+        )
+        self.running[session] = False
+        self.done[session] = False
+
+    def check(self, session):
+        """Raise ValueError if the session does not exist."""
+        if not 0 <= session < self.max_sessions or not self.allocated[session]:
+            raise ValueError(f"unknown session {session}")
+
+    def ids(self):
+        """Return the IDs of the allocated sessions."""
+        return numpy.flatnonzero(self.allocated)
+
+    def tick(self, sessions):
+        """
+        Advance many sessions by one tick
+
+        :param sessions: array of the IDs of the sessions to advance
+
+        :return: array of the IDs of the sessions whose workout is over
+        """
+        sessions = numpy.asarray(sessions, dtype=numpy.intp)
+        phases = self.running_state[sessions].astype(numpy.intp)
+        self.values[sessions, phases] -= 1
+        ended = self.values[sessions, phases] <= 0
+        sessions, phases = sessions[ended], phases[ended]
+        self.values[sessions, phases] = self.config[sessions, phases]
+
+        self.running_state[sessions[phases == PREPARE]] = RunningState.WORK
+        self.running_state[sessions[phases == WORK]] = RunningState.REST
+
+        rested = sessions[phases == REST]
+        self.running_state[rested] = RunningState.WORK
+        self.values[rested, CYCLES] -= 1
+        cycled = rested[self.values[rested, CYCLES] <= 0]
+        self.values[cycled, CYCLES] = self.config[cycled, CYCLES]
+        self.values[cycled, TABATAS] -= 1
+
+        finished = cycled[self.values[cycled, TABATAS] <= 0]
+        self.running_state[finished] = RunningState.PREPARE
+        self.running[finished] = False
+        self.done[finished] = True
+        return finished
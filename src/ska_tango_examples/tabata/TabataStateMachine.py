@@ -0,0 +1,138 @@
+from ska_tango_examples.tabata.IntervalProgram import (
+    MAX_PHASES,
+    PHASE_COUNTERS,
+    IntervalProgram,
+)
+from ska_tango_examples.tabata.RunningState import RunningState
+
+
+class TabataStateMachine:
+    """
+    The phase logic of a Tabata workout, run in-process.
+
+    A workout is a prepare phase followed, for every tabata, by a number of
+    cycles made of a work and a rest phase. The machine keeps the same five
+    counters as the Counter devices of a Tabata: every tick decrements the
+    counter of the current phase and, when it reaches zero, resets it and
+    moves to the next phase. An empty prepare phase is skipped.
+
+    The machine does no I/O: tick returns the counters it changed, so that
+    the caller only has to mirror the resulting values.
+
+    The workout is periodic, so the phase at any point of it is computed
+    arithmetically instead of replaying the ticks, and a workout can have
+    any number of cycles and tabatas. Its timeline of (phase, start tick)
+    entries is only laid out when read, for at most MAX_PHASES phases.
+    """
+
+    COUNTERS = ("prepare", "work", "rest", "cycles", "tabatas")
+
+    MAX_PHASES = MAX_PHASES
+
+    def __init__(self, prepare=10, work=20, rest=10, cycles=8, tabatas=1):
+        self.config = {
+            "prepare": prepare,
+            "work": work,
+            "rest": rest,
+            "cycles": cycles,
+            "tabatas": tabatas,
+        }
+        self._timeline = None
+        self.reset()
+
+    def reset(self):
+        """Put the counters back to their configured values."""
+        self.values = dict(self.config)
+        self.running_state = (
+            RunningState.PREPARE
+            if self.config["prepare"] > 0
+            else RunningState.WORK
+        )
+        self.done = False
+        self.ticks = 0
+
+    @property
+    def total_ticks(self):
+        """Return the number of ticks of the whole workout."""
+        config = self.config
+        return config["prepare"] + config["tabatas"] * config["cycles"] * (
+            config["work"] + config["rest"]
+        )
+
+    @property
+    def timeline(self):
+        """
+        Return the timeline of the workout
+
+        :return: numpy array of shape (phases, 2) holding the RunningState
+            and the start tick of every phase, in order
+
+        :raise ValueError: if the workout has more than MAX_PHASES phases
+        """
+        if self._timeline is None:
+            self._timeline = IntervalProgram.tabata(**self.config).timeline
+        return self._timeline
+
+    def phase_at(self, ticks):
+        """
+        Return the RunningState after a number of ticks
+
+        :param ticks: the ticks elapsed since the start of the workout
+
+        :return: RunningState (PREPARE once the workout is over, as at
+            the start)
+        """
+        config = self.config
+        if ticks < config["prepare"] or ticks >= self.total_ticks:
+            return RunningState.PREPARE
+        offset = (ticks - config["prepare"]) % (
+            config["work"] + config["rest"]
+        )
+        if offset < config["work"]:
+            return RunningState.WORK
+        return RunningState.REST
+
+    def remaining_ticks(self, ticks=None):
+        """Return the ticks left to the end of the workout."""
+        if ticks is None:
+            ticks = self.ticks
+        return max(self.total_ticks - ticks, 0)
+
+    def tick(self):
+        """
+        Advance the workout by one tick
+
+        :return: dict mapping the name of every changed counter to its new
+            value (empty once the workout is done)
+        """
+        if self.done:
+            return {}
+        self.ticks += 1
+        phase = PHASE_COUNTERS[self.running_state]
+        self.values[phase] -= 1
+        changed = {phase}
+        if self.values[phase] <= 0:
+            self._end_phase(phase, changed)
+        return {name: self.values[name] for name in changed}
+
+    def _end_phase(self, phase, changed):
+        self.values[phase] = self.config[phase]
+        if self.running_state == RunningState.PREPARE:
+            self.running_state = RunningState.WORK
+            return
+        if self.running_state == RunningState.WORK:
+            self.running_state = RunningState.REST
+            return
+
+        self.running_state = RunningState.WORK
+        self.values["cycles"] -= 1
+        changed.add("cycles")
+        if self.values["cycles"] > 0:
+            return
+
+        self.values["cycles"] = self.config["cycles"]
+        self.values["tabatas"] -= 1
+        changed.add("tabatas")
+        if self.values["tabatas"] <= 0:
+            self.running_state = RunningState.PREPARE
+            self.done = True
@@ -0,0 +1,114 @@
+class TimerWheel:
+    """
+    A hierarchical timing wheel.
+
+    Time is counted in integer ticks. The wheel has a number of levels of
+    slots each: a slot of level 0 lasts one tick, a slot of level n lasts
+    slots**n ticks. A timer is stored in the lowest level whose span
+    covers its delay and, each time the wheel enters a new slot of an
+    upper level, the timers of that slot cascade down to the level below.
+    Scheduling and cancelling a timer cost O(1) whatever the number of
+    timers, and advancing by one tick only looks at the slots that are
+    due.
+
+    A timer beyond the span of the top level is parked in the top level
+    and rescheduled when its slot comes round again.
+    """
+
+    def __init__(self, slots=64, levels=4):
+        if slots < 2 or levels < 1:
+            raise ValueError("the wheel needs 2 slots and 1 level at least")
+        self.slots = slots
+        self.levels = levels
+        self.now = 0
+        self._wheels = [[dict() for _ in range(slots)] for _ in range(levels)]
+        # key -> (level, slot, deadline)
+        self._timers = {}
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, key):
+        return key in self._timers
+
+    def schedule(self, key, deadline):
+        """
+        Schedule (or reschedule) the timer key
+
+        :param key: any hashable identifying the timer
+        :param deadline: the tick at which the timer expires; a deadline
+            in the past expires at the next tick
+        """
+        self.cancel(key)
+        self._insert(key, max(deadline, self.now + 1))
+
+    def cancel(self, key):
+        """Cancel the timer key, if scheduled."""
+        location = self._timers.pop(key, None)
+        if location is not None:
+            level, slot, _ = location
+            del self._wheels[level][slot][key]
+
+    def deadline(self, key):
+        """Return the deadline of the timer key (None if not scheduled)."""
+        location = self._timers.get(key)
+        return None if location is None else location[2]
+
+    def advance(self, to):
+        """
+        Move the wheel forward to the tick to
+
+        :return: list of the keys of the expired timers, in deadline order
+        """
+        expired = []
+        while self.now < to:
+            if not self._timers:
+                # nothing to expire: jump instead of walking every tick
+                self.now = to
+                break
+            self.now += 1
+            self._cascade()
+            timers = self._wheels[0][self.now % self.slots]
+            if timers:
+                due = list(timers.items())
+                timers.clear()
+                for key, deadline in due:
+                    del self._timers[key]
+                    if deadline > self.now:
+                        # parked beyond the span of a single level wheel
+                        self._insert(key, deadline)
+                    else:
+                        expired.append(key)
+        return expired
+
+    def _cascade(self):
+        # find the upper levels entering a new slot, then move their timers
+        # down starting from the top, so that a timer falling through
+        # many levels is never left in a slot already emptied
+        spans = []
+        span = self.slots
+        for _ in range(1, self.levels):
+            if self.now % span:
+                break
+            spans.append(span)
+            span *= self.slots
+        for level in range(len(spans), 0, -1):
+            span = spans[level - 1]
+            timers = self._wheels[level][(self.now // span) % self.slots]
+            if timers:
+                moved = list(timers.items())
+                timers.clear()
+                for key, deadline in moved:
+                    del self._timers[key]
+                    self._insert(key, deadline)
+
+    def _insert(self, key, deadline):
+        delay = deadline - self.now
+        level = 0
+        span = self.slots
+        while delay >= span and level < self.levels - 1:
+            level += 1
+            span *= self.slots
+        slot = (deadline // (span // self.slots)) % self.slots
+        self._wheels[level][slot][key] = deadline
+        self._timers[key] = (level, slot, deadline)
@@ -15,15 +15,20 @@ minutes and seconds.
 """
 
 import logging
+import math
 import threading
 import time
 
+import numpy
+
 # PyTango imports
 import tango
 from tango import AttrWriteType, DebugIt, DevState
 from tango.server import Device, attribute, command, device_property, run
 
 from ska_tango_examples.DevFactory import DevFactory
+from ska_tango_examples.EventDispatcher import EventDispatcher
+from ska_tango_examples.TickStatistics import TickStatistics
 
 # Additional import
 # PROTECTED REGION ID(Timer.additionnal_import) ENABLED START #
@@ -51,73 +56,212 @@ class Timer(Device):
         sleep_time
             - Sleep time
             - Type:'DevFloat'
+        internalClock
+            - Count down a single deadline instead of the counters
+            - Type:'DevBoolean'
+        push_rate
+            - Change events pushed per second of the internal clock
+            - Type:'DevFloat'
     """
 
     # PROTECTED REGION ID(Timer.class_variable) ENABLED START #
     def event_subscription(self):
-        self._dev_factory.get_device(self.secondsCounter).subscribe_event(
+        self._dispatcher.subscribe(
+            self._dev_factory.get_device(self.secondsCounter),
             "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
+            self.on_zero(self.end_minute),
             stateless=True,
         )
-        self._dev_factory.get_device(self.minutesCounter).subscribe_event(
+        self._dispatcher.subscribe(
+            self._dev_factory.get_device(self.minutesCounter),
             "value",
-            tango.EventType.CHANGE_EVENT,
-            self.handle_event,
+            self.on_zero(self.last_minute),
             stateless=True,
         )
 
+    def counter_names(self):
+        # with the internal clock the counters are optional mirrors: an
+        # empty name disables one
+        names = {
+            "minutes": self.minutesCounter,
+            "seconds": self.secondsCounter,
+        }
+        return {
+            counter: name for counter, name in names.items() if name.strip()
+        }
+
     def internal_reset_counters(self):
+        if self.internalClock:
+            with self._lock:
+                self._remaining = (
+                    60 * self._start_minutes + self._start_seconds
+                )
+            return self.publish(self._remaining)
+        # both counters are reset concurrently and every failure reported
         with self._lock:
-            self._dev_factory.get_device(self.minutesCounter).CounterReset(
-                self._start_minutes
-            )
-            self._dev_factory.get_device(self.secondsCounter).CounterReset(
-                self._start_seconds
+            results = self._dev_factory.command_inout(
+                {
+                    self.minutesCounter: ("CounterReset", self._start_minutes),
+                    self.secondsCounter: ("CounterReset", self._start_seconds),
+                }
             )
+        failed = [
+            dev_name
+            for dev_name, result in results.items()
+            if isinstance(result, tango.DevFailed)
+        ]
+        if failed:
+            for dev_name in failed:
+                self.logger.error(
+                    "Cannot reset %s: %s", dev_name, results[dev_name]
+                )
+            raise Exception(f"cannot reset {', '.join(failed)}")
+        return results
 
     def step_loop(self):
+        # every deadline is computed from the start time, so that the time
+        # spent decrementing the counter never adds up into a drift
         with tango.EnsureOmniThread():
+            start = scheduled = time.monotonic()
+            ticks = 0
             while not self.get_state() == tango.DevState.OFF:
                 # import debugpy; debugpy.debug_this_thread()
+                fired = time.monotonic()
                 with self._lock:
+                    locked = time.monotonic()
                     device = self._dev_factory.get_device(self.secondsCounter)
                     # self.logger.debug("SECONDS %s", device.value)
                     device.decrement()
-
-                time.sleep(self.sleep_time)
-
-    def handle_event(self, evt):
-        if evt.err:
-            error = evt.errors[0]
-            self.logger.error("%s %s", error.reason, error.desc)
-            return
-
-        if evt.attr_value.value == 0 and (
-            not self.get_state() == tango.DevState.OFF
-        ):
-            self.logger.debug(
-                "HANDLE EVENT %s %s",
-                evt.device.dev_name(),
-                evt.attr_value.value,
-            )
-
-            if evt.device.dev_name() == self.secondsCounter:
-                if self.get_state() == DevState.ALARM:
-                    with self._lock:
-                        self.set_state(DevState.OFF)
-                else:
-                    device = self._dev_factory.get_device(self.minutesCounter)
-                    with self._lock:
-                        device.decrement()
-                        self._dev_factory.get_device(
-                            self.secondsCounter
-                        ).CounterReset(59)
-                    # self.logger.debug("MINUTES %s", device.value)
-            else:
+                    called = time.monotonic()
+                self._tick_statistics.record(
+                    fired - scheduled, called - locked, locked - fired
+                )
+
+                ticks += 1
+                scheduled = start + ticks * self.sleep_time
+                time.sleep(max(scheduled - time.monotonic(), 0))
+
+    def clock_loop(self):
+        # the minutes and seconds are derived from a single deadline, so a
+        # rollover costs nothing and the two can never disagree
+        period = self.sleep_time / self.push_rate
+        with tango.EnsureOmniThread():
+            start = scheduled = time.monotonic()
+            pushes = 0
+            while True:
+                fired = time.monotonic()
+                with self._lock:
+                    locked = time.monotonic()
+                    remaining = self.time_left()
+                published = time.monotonic()
+                self.publish(remaining)
+                self._tick_statistics.record(
+                    fired - scheduled,
+                    time.monotonic() - published,
+                    locked - fired,
+                )
                 with self._lock:
-                    self.set_state(DevState.ALARM)
+                    # a Stop takes the lock, so its OFF state is never lost
+                    if self._stop.is_set():
+                        break
+                    if remaining == 0:
+                        self.set_state(DevState.OFF)
+                        break
+                    if self._minutes == 0:
+                        self.set_state(DevState.ALARM)
+                pushes += 1
+                scheduled = min(start + pushes * period, self._deadline)
+                if self._stop.wait(max(scheduled - time.monotonic(), 0)):
+                    break
+            with self._lock:
+                self._remaining = self.time_left()
+                self._deadline = None
+
+    def time_left(self):
+        # seconds of the clock left, called with the lock held
+        if self._deadline is None:
+            return self._remaining
+        return max((self._deadline - time.monotonic()) / self.sleep_time, 0)
+
+    def publish(self, remaining):
+        # push the derived values, and mirror them on the counters if any
+        minutes, seconds = divmod(math.ceil(remaining), 60)
+        self.push_change_event("remaining", float(remaining))
+        changed = {}
+        if minutes != self._minutes:
+            self._minutes = minutes
+            self.push_change_event("minutes", minutes)
+            changed["minutes"] = minutes
+        if seconds != self._seconds:
+            self._seconds = seconds
+            self.push_change_event("seconds", seconds)
+            changed["seconds"] = seconds
+        names = self.counter_names()
+        results = self._dev_factory.command_inout(
+            {
+                names[counter]: ("CounterReset", value)
+                for counter, value in changed.items()
+                if counter in names
+            }
+        )
+        for dev_name, result in results.items():
+            if isinstance(result, tango.DevFailed):
+                self.logger.error("Cannot update %s: %s", dev_name, result)
+        return results
+
+    def clock(self):
+        # the minutes and seconds left, from the counters or the deadline
+        if self.internalClock:
+            with self._lock:
+                remaining = self.time_left()
+            minutes, seconds = divmod(math.ceil(remaining), 60)
+            return minutes, seconds, float(remaining)
+        # the two counters are read concurrently, in one round-trip
+        names = (self.minutesCounter, self.secondsCounter)
+        results = self._dev_factory.read_attributes(
+            {name: ["value"] for name in names}
+        )
+        values = []
+        for name in names:
+            result = results[name]
+            if isinstance(result, tango.DevFailed):
+                raise result
+            if result["value"] is None:
+                raise Exception(f"cannot read {name}")
+            values.append(result["value"])
+        minutes, seconds = values
+        return minutes, seconds, float(60 * minutes + seconds)
+
+    def on_zero(self, transition):
+        # a transition happens when its counter reaches zero while running
+        def handle_event(evt):
+            if evt.attr_value.value == 0 and (
+                not self.get_state() == tango.DevState.OFF
+            ):
+                self.logger.debug(
+                    "HANDLE EVENT %s %s",
+                    evt.device.dev_name(),
+                    evt.attr_value.value,
+                )
+                transition()
+
+        return handle_event
+
+    def end_minute(self):
+        if self.get_state() == DevState.ALARM:
+            with self._lock:
+                self.set_state(DevState.OFF)
+        else:
+            device = self._dev_factory.get_device(self.minutesCounter)
+            seconds = self._dev_factory.get_device(self.secondsCounter)
+            with self._lock:
+                device.decrement()
+                seconds.CounterReset(59)
+            # self.logger.debug("MINUTES %s", device.value)
+
+    def last_minute(self):
+        with self._lock:
+            self.set_state(DevState.ALARM)
 
     def is_Start_allowed(self):
         return self.get_state() == tango.DevState.OFF
@@ -144,6 +288,10 @@ class Timer(Device):
 
     sleep_time = device_property(dtype="DevFloat", default_value=1)
 
+    internalClock = device_property(dtype="DevBoolean", default_value=False)
+
+    push_rate = device_property(dtype="DevFloat", default_value=1)
+
     # ----------
     # Attributes
     # ----------
@@ -158,6 +306,55 @@ class Timer(Device):
         access=AttrWriteType.READ_WRITE,
     )
 
+    minutes = attribute(
+        dtype="DevShort",
+        doc="Minutes left",
+    )
+
+    seconds = attribute(
+        dtype="DevShort",
+        doc="Seconds left in the current minute",
+    )
+
+    remaining = attribute(
+        dtype="DevDouble",
+        unit="s",
+        doc="Seconds left to the end of the countdown",
+    )
+
+    tick_lateness = attribute(
+        dtype=("DevDouble",),
+        max_dim_x=TickStatistics.DEFAULT_SIZE,
+        unit="s",
+        doc="Delay of the last ticks after their scheduled time, the oldest "
+        "first",
+    )
+
+    tick_edges = attribute(
+        dtype=("DevDouble",),
+        max_dim_x=len(TickStatistics.DEFAULT_EDGES),
+        unit="s",
+        doc="Upper bounds of the buckets of the tick histograms",
+    )
+
+    tick_lateness_histogram = attribute(
+        dtype=("DevLong",),
+        max_dim_x=len(TickStatistics.DEFAULT_EDGES) + 1,
+        doc="Number of the last ticks by delay after their scheduled time",
+    )
+
+    tick_rpc_histogram = attribute(
+        dtype=("DevLong",),
+        max_dim_x=len(TickStatistics.DEFAULT_EDGES) + 1,
+        doc="Number of the last ticks by time spent decrementing the seconds",
+    )
+
+    tick_lock_wait_histogram = attribute(
+        dtype=("DevLong",),
+        max_dim_x=len(TickStatistics.DEFAULT_EDGES) + 1,
+        doc="Number of the last ticks by time spent waiting for the lock",
+    )
+
     # ---------------
     # General methods
     # ---------------
@@ -167,10 +364,25 @@ class Timer(Device):
         Device.init_device(self)
         # PROTECTED REGION ID(Timer.init_device) ENABLED START #
         self.logger = logging.getLogger(__name__)
+        if self.push_rate <= 0:
+            raise ValueError(
+                f"push_rate must be positive, not {self.push_rate}"
+            )
         self._lock = threading.Lock()
         self._dev_factory = DevFactory()
+        self._dispatcher = EventDispatcher()
+        # resolve the counters together instead of one by one on first use
+        self._dev_factory.warm_up(self.counter_names().values())
         self._start_minutes = 0
         self._start_seconds = 0
+        self._remaining = 0
+        self._deadline = None
+        self._minutes = None
+        self._seconds = None
+        self._stop = threading.Event()
+        for name in ("minutes", "seconds", "remaining"):
+            self.set_change_event(name, True, False)
+        self._tick_statistics = TickStatistics()
         self.subscribed = False
         self.set_state(DevState.OFF)
         self.worker_thread = None
@@ -180,7 +392,8 @@ class Timer(Device):
         """Method always executed before any TANGO command is executed."""
         # PROTECTED REGION ID(Timer.always_executed_hook) ENABLED START #
         if not self.subscribed:
-            self.event_subscription()
+            if not self.internalClock:
+                self.event_subscription()
             self.subscribed = True
             self.internal_reset_counters()
         # PROTECTED REGION END #    //  Timer.always_executed_hook
@@ -193,6 +406,12 @@ class Timer(Device):
         destructor and by the device Init command.
         """
         # PROTECTED REGION ID(Timer.delete_device) ENABLED START #
+        # the worker thread must not outlive the device
+        if self.worker_thread is not None and self.worker_thread.is_alive():
+            self.set_state(DevState.OFF)
+            self._stop.set()
+            self.worker_thread.join()
+        self._dev_factory.release()
         # PROTECTED REGION END #    //  Timer.delete_device
 
     # ------------------
@@ -229,6 +448,54 @@ class Timer(Device):
         self._start_seconds = value
         # PROTECTED REGION END #    //  Timer.start_seconds_write
 
+    def read_minutes(self):
+        # PROTECTED REGION ID(Timer.minutes_read) ENABLED START #
+        """Return the minutes attribute."""
+        return self.clock()[0]
+        # PROTECTED REGION END #    //  Timer.minutes_read
+
+    def read_seconds(self):
+        # PROTECTED REGION ID(Timer.seconds_read) ENABLED START #
+        """Return the seconds attribute."""
+        return self.clock()[1]
+        # PROTECTED REGION END #    //  Timer.seconds_read
+
+    def read_remaining(self):
+        # PROTECTED REGION ID(Timer.remaining_read) ENABLED START #
+        """Return the remaining attribute."""
+        return self.clock()[2]
+        # PROTECTED REGION END #    //  Timer.remaining_read
+
+    def read_tick_lateness(self):
+        # PROTECTED REGION ID(Timer.tick_lateness_read) ENABLED START #
+        """Return the tick_lateness attribute."""
+        return self._tick_statistics.samples("lateness")
+        # PROTECTED REGION END #    //  Timer.tick_lateness_read
+
+    def read_tick_edges(self):
+        # PROTECTED REGION ID(Timer.tick_edges_read) ENABLED START #
+        """Return the tick_edges attribute."""
+        return self._tick_statistics.edges
+        # PROTECTED REGION END #    //  Timer.tick_edges_read
+
+    def read_tick_lateness_histogram(self):
+        # PROTECTED REGION ID(Timer.tick_lateness_histogram_read) ENABLED START #
+        """Return the tick_lateness_histogram attribute."""
+        return self._tick_statistics.histogram("lateness").astype(numpy.int32)
+        # PROTECTED REGION END #    //  Timer.tick_lateness_histogram_read
+
+    def read_tick_rpc_histogram(self):
+        # PROTECTED REGION ID(Timer.tick_rpc_histogram_read) ENABLED START #
+        """Return the tick_rpc_histogram attribute."""
+        return self._tick_statistics.histogram("rpc").astype(numpy.int32)
+        # PROTECTED REGION END #    //  Timer.tick_rpc_histogram_read
+
+    def read_tick_lock_wait_histogram(self):
+        # PROTECTED REGION ID(Timer.tick_lock_wait_histogram_read) ENABLED START #
+        """Return the tick_lock_wait_histogram attribute."""
+        return self._tick_statistics.histogram("lock_wait").astype(numpy.int32)
+        # PROTECTED REGION END #    //  Timer.tick_lock_wait_histogram_read
+
     # --------
     # Commands
     # --------
@@ -255,7 +522,15 @@ class Timer(Device):
         :return:None
         """
         self.set_state(tango.DevState.RUNNING)
-        self.worker_thread = threading.Thread(target=self.step_loop)
+        if self.internalClock:
+            with self._lock:
+                self._deadline = (
+                    time.monotonic() + self._remaining * self.sleep_time
+                )
+            self._stop.clear()
+            self.worker_thread = threading.Thread(target=self.clock_loop)
+        else:
+            self.worker_thread = threading.Thread(target=self.step_loop)
         self.worker_thread.start()
         # PROTECTED REGION END #    //  Timer.Start
 
@@ -268,7 +543,9 @@ class Timer(Device):
 
         :return:None
         """
-        self.set_state(DevState.OFF)
+        with self._lock:
+            self._stop.set()
+            self.set_state(DevState.OFF)
         self.worker_thread.join()
         # PROTECTED REGION END #    //  Timer.Stop
 
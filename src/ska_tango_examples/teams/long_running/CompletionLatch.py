@@ -0,0 +1,82 @@
+import threading
+import time
+
+
+class CompletionLatch:
+    """
+    A countdown latch over the commands a parent waits for.
+
+    The parent adds the id of every command it queued on a child, the
+    longRunningCommandResult callbacks complete them, and wait returns as
+    soon as the last one is completed instead of polling.
+
+    A command can be completed before it is added: its result event may
+    arrive before the parent has gathered the id returned by the child.
+    The completion is remembered and the command is never waited for.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._children = {}
+        self._pending = set()
+        self._completed = {}
+
+    def add(self, command_id, child=None):
+        """
+        Expect the completion of a command
+
+        :param command_id: the id of the command queued by the child
+        :param child: the name of the child, the command id if None
+        """
+        with self._condition:
+            self._children[command_id] = child or command_id
+            if command_id not in self._completed:
+                self._pending.add(command_id)
+
+    def complete(self, command_id):
+        """
+        Record the completion of a command, waking the waiters if it was
+        the last one
+
+        :return: False if the command was already completed
+        """
+        with self._condition:
+            if command_id in self._completed:
+                return False
+            self._completed[command_id] = time.time()
+            self._pending.discard(command_id)
+            if not self._pending:
+                self._condition.notify_all()
+            return True
+
+    def wait(self, timeout=None):
+        """
+        Wait for every command added to complete
+
+        :param timeout: seconds to wait, fractional or None for ever
+
+        :return: True if every command completed in time
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending, timeout)
+
+    @property
+    def pending(self):
+        """Return the children whose command is not completed yet."""
+        with self._condition:
+            return sorted(self._children[key] for key in self._pending)
+
+    @property
+    def pending_commands(self):
+        """Return the ids of the commands not completed yet."""
+        with self._condition:
+            return sorted(self._pending)
+
+    def timestamps(self):
+        """Return a dict mapping each child to its completion time."""
+        with self._condition:
+            return {
+                child: self._completed[command_id]
+                for command_id, child in self._children.items()
+                if command_id in self._completed
+            }
@@ -1,7 +1,6 @@
 # pylint: disable=abstract-method
-import json
+import concurrent.futures
 import threading
-import time
 from typing import Callable, Optional
 
 import tango
@@ -9,10 +8,24 @@ from ska_control_model import PowerState, TaskStatus
 from ska_tango_base import SKABaseDevice
 from ska_tango_base.commands import ResultCode, SubmittedSlowCommand
 from ska_tango_base.executor import TaskExecutorComponentManager
-from tango.server import command, device_property, run
+from tango.server import attribute, command, device_property, run
+
+from ska_tango_examples.DevFactory import DevFactory
+from ska_tango_examples.teams.long_running.CompletionLatch import (
+    CompletionLatch,
+)
+from ska_tango_examples.teams.long_running.ProgressAggregator import (
+    ProgressAggregator,
+)
+from ska_tango_examples.teams.long_running.ResultRouter import ResultRouter
 
 
 class LRComponentManager(TaskExecutorComponentManager):
+    # the stations are commanded concurrently by a pool of this many threads
+    FAN_OUT_WORKERS = 32
+    # the progress is reported at most once every this many seconds
+    PROGRESS_INTERVAL = 0.5
+
     def __init__(
         self,
         max_queue_size,
@@ -20,8 +33,17 @@ class LRComponentManager(TaskExecutorComponentManager):
         push_change_event=None,
         stations=(),
         state_change_callback=None,
+        station_weights=(),
     ):
         self.stations = stations
+        # a station counts for 1 in the progress when no weight is given
+        station_weights = station_weights or ()
+        if station_weights and len(station_weights) != len(stations):
+            raise ValueError(
+                f"{len(station_weights)} station weights given for "
+                f"{len(stations)} stations"
+            )
+        self.station_weights = dict(zip(stations, station_weights))
         self.max_queue_size = max_queue_size
         self.push_change_event = push_change_event
         self.scanning = False
@@ -36,45 +58,216 @@ class LRComponentManager(TaskExecutorComponentManager):
         )
         self.logger.info("Controller component manager initialised")
 
-        self.station_on_cmds = {}
-        self.station_off_cmds = {}
+        self.station_on_cmds = CompletionLatch()
+        self.station_off_cmds = CompletionLatch()
+        self.station_on_progress = ProgressAggregator()
+        self.station_off_progress = ProgressAggregator()
+        self._router = ResultRouter(self.logger)
+        self._dev_factory = DevFactory()
+        self._station_names = None
+        self._fan_out_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.FAN_OUT_WORKERS,
+            thread_name_prefix="LRController",
+        )
 
-    def get_station_proxies(self):
-        stations = [tango.DeviceProxy(station) for station in self.stations]
-        return stations, len(stations)
+    def get_station_names(self):
+        # the proxies are built in parallel once, and reused until the
+        # stations change
+        stations = tuple(self.stations)
+        if stations != self._station_names:
+            self._dev_factory.release()
+            concurrent.futures.wait(
+                self._dev_factory.warm_up(stations).values()
+            )
+            self._station_names = stations
+        return stations
+
+    def station_on_result(self, command_id, result):
+        if result[0] == int(ResultCode.OK):
+            self.station_on_cmds.complete(command_id)
+            self.station_on_progress.complete(command_id)
+
+    def station_off_result(self, command_id, result):
+        if result[0] == int(ResultCode.OK):
+            self.station_off_cmds.complete(command_id)
+            self.station_off_progress.complete(command_id)
+
+    def _progress_aggregators(self, task_callback):
+        # the first half of the progress is the queueing of the commands,
+        # the second half the weighted progress of the stations; both
+        # report through the same gate, so that a late queueing update
+        # never takes the progress back once a station has reported
+        lock = threading.Lock()
+        # the task starts with a progress of 0
+        reported = [0]
+
+        def report(progress):
+            with lock:
+                if progress <= reported[0]:
+                    return
+                reported[0] = progress
+                task_callback(progress=progress)
+
+        return tuple(
+            ProgressAggregator(
+                report if task_callback else None,
+                start=start,
+                span=50,
+                min_interval=self.PROGRESS_INTERVAL,
+            )
+            for start in (0, 50)
+        )
 
-    def station_on_event(self, event: tango.EventData):
-        # event.attr_value will be empty if the event is in error.
-        if not event.err:
-            id = event.attr_value.value[0]
-            if event.attr_value.value[1]:
-                result = json.loads(event.attr_value.value[1])
-                if id in self.station_on_cmds and result[0] == int(
-                    ResultCode.OK
-                ):
-                    self.station_on_cmds[id] = True
+    def subscriptions(self):
+        """Return the number of stations subscribed to."""
+        return len(self._router)
+
+    def unsubscribe(self):
+        """Drop the subscriptions to the stations."""
+        self._router.unsubscribe()
+
+    def release(self):
+        """Release the proxies of the stations and the fan-out threads."""
+        self._fan_out_executor.shutdown(wait=False, cancel_futures=True)
+        self._dev_factory.release()
+
+    def _queue_station_command(self, station_name, command_name):
+        # the proxy is got here, so that a station that cannot be reached
+        # fails its own command only; a station is subscribed to once, on
+        # its first command
+        with tango.EnsureOmniThread():
+            station = self._dev_factory.get_device(station_name)
+            self._router.subscribe([station])
+            return station.command_inout(command_name)
+
+    def _drop_routes(self, station_cmds):
+        for command_id in station_cmds.pending_commands:
+            self._router.unroute(command_id)
+
+    def _queue_on_stations(
+        self,
+        command_name,
+        result_handler,
+        station_cmds,
+        station_progress,
+        queue_progress,
+        task_callback=None,
+        task_abort_event=None,
+    ):
+        """
+        Send a command to every station concurrently
+
+        The command ids queued by the stations are added to the
+        station_cmds latch and to the station_progress aggregator, and
+        their results and progress routed to result_handler and
+        station_progress as the stations reply, so the whole fan-out lasts
+        as long as the slowest station rather than the sum of all of them.
+        Every station queueing its command completes its part of the
+        queue_progress aggregator. The task callback is given the result
+        if the task is aborted or any station fails to queue its command.
+
+        :return: True if every station queued the command
+        """
+        stations = self.get_station_names()
+        for station in stations:
+            queue_progress.add(station)
+        futures = {
+            self._fan_out_executor.submit(
+                self._queue_station_command,
+                station,
+                command_name,
+            ): station
+            for station in stations
+        }
+        failed = []
+        # TODO add a method to ska-tango-base to prevent race condition
+        # when calling long running commands.
+        # There is a race condition where a submitted task (e.g. _on())
+        # can finish execution before the submit task method returns (e.g.
+        # on()).
+        # The long running commands in this example are sufficiently slow
+        # that they do not complete execution before the submit task
+        # finishes.
+        for future in concurrent.futures.as_completed(futures):
+            if task_abort_event and task_abort_event.is_set():
+                # only the commands not sent yet can be cancelled
+                sent = [
+                    name
+                    for pending, name in futures.items()
+                    if not pending.cancel()
+                ]
+                self.logger.warning(
+                    "Controller %s aborted, it may be queued by %s",
+                    command_name,
+                    sent,
+                )
+                message = f"Controller {command_name} aborted"
+                if task_callback:
+                    task_callback(
+                        status=TaskStatus.ABORTED,
+                        result=(ResultCode.ABORTED, message),
+                    )
 
-        return
+                self._drop_routes(station_cmds)
+                return False
+
+            station = futures[future]
+            try:
+                return_code, id_or_msg = future.result()
+            except tango.DevFailed as df:
+                self.logger.error(
+                    "Station %s %s failed: %s",
+                    station,
+                    command_name,
+                    df,
+                )
+                failed.append(station)
+                continue
+            if return_code[0] == ResultCode.QUEUED:
+                station_cmds.add(id_or_msg[0], station)
+                station_progress.add(
+                    id_or_msg[0],
+                    self.station_weights.get(station, 1.0),
+                )
+                self._router.route(
+                    id_or_msg[0], result_handler, station_progress.update
+                )
+                queue_progress.complete(station)
+            else:
+                self.logger.error(
+                    "Station %s %s not queued: %s",
+                    station,
+                    command_name,
+                    id_or_msg[0],
+                )
+                failed.append(station)
 
-    def station_off_event(self, event: tango.EventData):
-        # event.attr_value will be empty if the event is in error.
-        if not event.err:
-            id = event.attr_value.value[0]
-            if event.attr_value.value[1]:
-                result = json.loads(event.attr_value.value[1])
-                if id in self.station_off_cmds and result[0] == int(
-                    ResultCode.OK
-                ):
-                    self.station_off_cmds[id] = True
+        if failed:
+            result = (
+                ResultCode.FAILED,
+                f"Could not queue station {', '.join(failed)} "
+                f"{command_name} command",
+            )
+            if task_callback is not None:
+                task_callback(status=TaskStatus.COMPLETED, result=result)
 
-        return
+            self._drop_routes(station_cmds)
+            return False
 
-    def _wait_for_stations_event(self, station_events: dict, timeout: int = 5):
-        while timeout > 0:
-            if all(station_events.values()):
-                return True
-            timeout -= 1
-            time.sleep(1)
+        return True
+
+    def _wait_for_stations_event(
+        self, station_events: CompletionLatch, timeout: float = 5
+    ):
+        if station_events.wait(timeout):
+            self.logger.debug(
+                "Station commands completed at %s", station_events.timestamps()
+            )
+            return True
+        self.logger.error(
+            "Station commands not completed: %s", station_events.pending
+        )
+        self._drop_routes(station_events)
         return False
 
     def wait_for_stations_on(self, timeout=5):
@@ -107,56 +300,20 @@ class LRComponentManager(TaskExecutorComponentManager):
         if task_callback:
             task_callback(status=TaskStatus.IN_PROGRESS, progress=0)
 
-        self.station_on_cmds = {}
-
-        (
-            stations,
-            num_stations,
-        ) = self.get_station_proxies()
-        count = 0
-        for station in stations:
-            count += 1
-            if task_abort_event and task_abort_event.is_set():
-                message = "Controller On aborted"
-                if task_callback:
-                    task_callback(
-                        status=TaskStatus.ABORTED,
-                        result=(ResultCode.ABORTED, message),
-                    )
-
-                return
-
-            station.subscribe_event(
-                "longRunningCommandResult",
-                tango.EventType.CHANGE_EVENT,
-                self.station_on_event,
-            )
-            return_code, id_or_msg = station.On()
-            # TODO add a method to ska-tango-base to prevent race condition
-            # when calling long running commands.
-            # There is a race condition where a submitted task (e.g. _on())
-            # can finish execution before the submit task method returns (e.g.
-            # on()).
-            # The long running commands in this example are sufficiently slow
-            # that they do not complete execution before the submit task
-            # finishes.
-            if return_code[0] == ResultCode.QUEUED:
-                self.station_on_cmds[id_or_msg[0]] = False
-                if task_callback:
-                    # Progress is a percentage
-                    task_callback(progress=int((count / num_stations) * 50))
-            else:
-                if task_callback:
-                    result = (
-                        ResultCode.FAILED,
-                        f"Could not queue station {station.name()} On command",
-                    )
-                    if task_callback is not None:
-                        task_callback(
-                            status=TaskStatus.COMPLETED, result=result
-                        )
-
-                return
+        self.station_on_cmds = CompletionLatch()
+        queue_progress, self.station_on_progress = self._progress_aggregators(
+            task_callback
+        )
+        if not self._queue_on_stations(
+            "On",
+            self.station_on_result,
+            self.station_on_cmds,
+            self.station_on_progress,
+            queue_progress,
+            task_callback=task_callback,
+            task_abort_event=task_abort_event,
+        ):
+            return
 
         if self.wait_for_stations_on(timeout=16):
             result = (ResultCode.OK, "Controller On completed")
@@ -203,56 +360,20 @@ class LRComponentManager(TaskExecutorComponentManager):
         if task_callback:
             task_callback(status=TaskStatus.IN_PROGRESS, progress=0)
 
-        self.station_off_cmds = {}
-
-        (
-            stations,
-            num_stations,
-        ) = self.get_station_proxies()
-        count = 0
-        for station in stations:
-            count += 1
-            if task_abort_event and task_abort_event.is_set():
-                message = "Controller Off aborted"
-                if task_callback:
-                    task_callback(
-                        status=TaskStatus.ABORTED,
-                        result=(ResultCode.ABORTED, message),
-                    )
-
-                return
-
-            station.subscribe_event(
-                "longRunningCommandResult",
-                tango.EventType.CHANGE_EVENT,
-                self.station_off_event,
-            )
-            return_code, id_or_msg = station.Off()
-            # TODO add a method to ska-tango-base to prevent race condition
-            # when calling long running commands.
-            # There is a race condition where a submitted task (e.g. _off())
-            # can finish execution before the submit task method returns (e.g.
-            # off()).
-            # The long running commands in this example are sufficiently slow
-            # that they do not complete execution before the submit task
-            # finishes.
-            if return_code[0] == ResultCode.QUEUED:
-                self.station_off_cmds[id_or_msg[0]] = False
-                if task_callback:
-                    # Progress is a percentage
-                    task_callback(progress=int((count / num_stations) * 50))
-            else:
-                if task_callback:
-                    result = (
-                        ResultCode.FAILED,
-                        f"Could not queue station {station.name()} Off command",
-                    )
-                    if task_callback is not None:
-                        task_callback(
-                            status=TaskStatus.COMPLETED, result=result
-                        )
-
-                return
+        self.station_off_cmds = CompletionLatch()
+        queue_progress, self.station_off_progress = self._progress_aggregators(
+            task_callback
+        )
+        if not self._queue_on_stations(
+            "Off",
+            self.station_off_result,
+            self.station_off_cmds,
+            self.station_off_progress,
+            queue_progress,
+            task_callback=task_callback,
+            task_abort_event=task_abort_event,
+        ):
+            return
 
         if self.wait_for_stations_off(timeout=16):
             result = (ResultCode.OK, "Controller Off completed")
@@ -291,6 +412,15 @@ class LRController(SKABaseDevice):
         default_value=["test/lrcstation/1"],
     )
 
+    stationWeights = device_property(
+        dtype=[
+            float,
+        ],
+        mandatory=False,
+        doc="Weight of each station in the progress of the controller, in "
+        "the order of the stations (1 for every station if empty)",
+    )
+
     class InitCommand(SKABaseDevice.InitCommand):
         """
         A class for the LRController init_device()
@@ -300,12 +430,22 @@ class LRController(SKABaseDevice):
             super().do()
             self._device._component_state_changed(power=PowerState.STANDBY)
 
+    def delete_device(self):
+        self.component_manager.unsubscribe()
+        self.component_manager.release()
+        super().delete_device()
+
+    @attribute(dtype="DevLong", doc="Number of stations subscribed to")
+    def childSubscriptions(self):
+        return self.component_manager.subscriptions()
+
     def create_component_manager(self):
         return LRComponentManager(
             max_queue_size=5,
             logger=self.logger,
             push_change_event=self.push_change_event,
             stations=self.stations,
+            station_weights=self.stationWeights,
             state_change_callback=self._component_state_changed,
         )
 
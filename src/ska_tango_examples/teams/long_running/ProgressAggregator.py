@@ -0,0 +1,92 @@
+import threading
+import time
+
+
+class ProgressAggregator:
+    """
+    The weighted progress of the commands a parent waits for.
+
+    Each command queued on a child is added with a weight, and every
+    update of its progress (a percentage) moves a running weighted sum:
+    the aggregate progress is therefore computed in constant time,
+    whatever the number of children.
+
+    The aggregate is mapped to the range [start, start + span] of the
+    parent progress and passed to the callback when it grows, at most
+    once every min_interval seconds except for the last update, so that
+    a storm of child updates does not become a storm of parent events.
+    Adding a command may lower the aggregate: it is reported again once
+    it grows beyond the last value reported.
+    """
+
+    def __init__(self, callback=None, start=0, span=100, min_interval=0.5):
+        self.callback = callback
+        self.start = start
+        self.span = span
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._weights = {}
+        self._progress = {}
+        self._total_weight = 0.0
+        self._weighted_sum = 0.0
+        self._reported = None
+        self._reported_at = None
+
+    def add(self, command_id, weight=1.0):
+        """Count the progress of a command, with a weight."""
+        with self._lock:
+            if command_id in self._weights:
+                return
+            self._weights[command_id] = weight
+            self._progress[command_id] = 0
+            self._total_weight += weight
+
+    def update(self, command_id, progress):
+        """
+        Record the progress of a command and report the aggregate
+
+        :param progress: percentage of the command done, clamped to
+            [0, 100]
+        """
+        with self._lock:
+            weight = self._weights.get(command_id)
+            if weight is None:
+                return
+            progress = min(max(progress, 0), 100)
+            self._weighted_sum += weight * (
+                progress - self._progress[command_id]
+            )
+            self._progress[command_id] = progress
+            value = self._value()
+            now = time.monotonic()
+            if self._reported is not None and value <= self._reported:
+                return
+            done = value == self.start + self.span
+            if (
+                not done
+                and self._reported_at is not None
+                and now - self._reported_at < self.min_interval
+            ):
+                return
+            self._reported = value
+            self._reported_at = now
+            # reported under the lock, so that the progress never goes back
+            if self.callback is not None:
+                self.callback(value)
+
+    def complete(self, command_id):
+        """Record the end of a command."""
+        self.update(command_id, 100)
+
+    @property
+    def value(self):
+        """Return the aggregate progress, in [start, start + span]."""
+        with self._lock:
+            return self._value()
+
+    def _value(self):
+        if not self._total_weight:
+            return self.start
+        done = self._weighted_sum / (100 * self._total_weight)
+        # the epsilon absorbs the rounding of the running sum
+        return self.start + int(self.span * done + 1e-9)
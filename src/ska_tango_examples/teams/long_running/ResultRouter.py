@@ -0,0 +1,152 @@
+import collections
+import json
+import logging
+import threading
+
+import tango
+
+
+class ResultRouter:
+    """
+    The long-lived longRunningCommandResult subscriptions of a parent.
+
+    The parent subscribes once to every child, instead of once per
+    command, and routes the results by command id to the handler of the
+    command waiting for them. A route is used once: it is dropped when
+    its result is delivered. The longRunningCommandProgress of the
+    children is routed the same way, until the result arrives.
+
+    A result can arrive before its command is routed, while the parent is
+    still gathering the ids returned by the children. The last
+    MAX_UNROUTED such results are kept and delivered when their command
+    is routed.
+    """
+
+    MAX_UNROUTED = 1024
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self._routes = {}
+        self._progress_routes = {}
+        self._unrouted = collections.OrderedDict()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def subscribe(self, proxies):
+        """Subscribe to the results of the children not subscribed yet."""
+        for proxy in proxies:
+            dev_name = proxy.dev_name()
+            with self._lock:
+                if dev_name in self._subscriptions:
+                    continue
+            event_ids = [
+                proxy.subscribe_event(
+                    attr_name,
+                    tango.EventType.CHANGE_EVENT,
+                    callback,
+                )
+                for attr_name, callback in (
+                    ("longRunningCommandResult", self.on_result),
+                    ("longRunningCommandProgress", self.on_progress),
+                )
+            ]
+            with self._lock:
+                duplicate = dev_name in self._subscriptions
+                if not duplicate:
+                    self._subscriptions[dev_name] = (proxy, event_ids)
+            if duplicate:
+                for event_id in event_ids:
+                    proxy.unsubscribe_event(event_id)
+
+    def unsubscribe(self):
+        """Drop every subscription and route."""
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, {}
+            self._routes.clear()
+            self._progress_routes.clear()
+            self._unrouted.clear()
+        for dev_name, (proxy, event_ids) in subscriptions.items():
+            try:
+                for event_id in event_ids:
+                    proxy.unsubscribe_event(event_id)
+            except tango.DevFailed as df:
+                self.logger.warning("Cannot unsubscribe %s: %s", dev_name, df)
+
+    def route(self, command_id, handler, progress_handler=None):
+        """
+        Route the result of a command to handler
+
+        :param command_id: the id of the command queued by a child
+        :param handler: callable receiving the command id and the decoded
+            result, a (ResultCode, message) list
+        :param progress_handler: callable receiving the command id and
+            every progress (a percentage) of the command until its result
+        """
+        with self._lock:
+            result = self._unrouted.pop(command_id, None)
+            if result is None:
+                self._routes[command_id] = handler
+                if progress_handler is not None:
+                    self._progress_routes[command_id] = progress_handler
+                return
+        handler(command_id, result)
+
+    def unroute(self, command_id):
+        """Drop the route of a command no longer waited for."""
+        with self._lock:
+            self._routes.pop(command_id, None)
+            self._progress_routes.pop(command_id, None)
+
+    def stats(self):
+        """
+        Return the router counters
+
+        :return: dict with the number of subscriptions, routes waiting
+            for their result or progress and results kept before their
+            route
+        """
+        with self._lock:
+            return {
+                "subscriptions": len(self._subscriptions),
+                "routes": len(self._routes),
+                "progress_routes": len(self._progress_routes),
+                "unrouted": len(self._unrouted),
+            }
+
+    def on_result(self, event: tango.EventData):
+        """The callback of the subscriptions."""
+        # event.attr_value will be empty if the event is in error.
+        if event.err:
+            return
+        command_id, result = event.attr_value.value
+        if not result:
+            return
+        result = json.loads(result)
+        with self._lock:
+            handler = self._routes.pop(command_id, None)
+            self._progress_routes.pop(command_id, None)
+            if handler is None:
+                self._unrouted[command_id] = result
+                if len(self._unrouted) > self.MAX_UNROUTED:
+                    self._unrouted.popitem(last=False)
+                return
+        handler(command_id, result)
+
+    def on_progress(self, event: tango.EventData):
+        """The callback of the progress subscriptions."""
+        if event.err or not event.attr_value.value:
+            return
+        # the progress is a flat list of (command id, percentage) pairs
+        values = event.attr_value.value
+        with self._lock:
+            routed = [
+                (self._progress_routes[command_id], command_id, progress)
+                for command_id, progress in zip(values[::2], values[1::2])
+                if command_id in self._progress_routes
+            ]
+        for progress_handler, command_id, progress in routed:
+            progress_handler(command_id, int(progress))
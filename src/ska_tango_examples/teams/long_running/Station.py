@@ -1,7 +1,6 @@
 # pylint: disable=abstract-method
-import json
+import concurrent.futures
 import threading
-import time
 from typing import Callable, Optional
 
 import tango
@@ -9,10 +8,22 @@ from ska_control_model import PowerState, TaskStatus
 from ska_tango_base import SKABaseDevice
 from ska_tango_base.commands import ResultCode, SubmittedSlowCommand
 from ska_tango_base.executor import TaskExecutorComponentManager
-from tango.server import command, device_property, run
+from tango.server import attribute, command, device_property, run
+
+from ska_tango_examples.DevFactory import DevFactory
+from ska_tango_examples.teams.long_running.CompletionLatch import (
+    CompletionLatch,
+)
+from ska_tango_examples.teams.long_running.ProgressAggregator import (
+    ProgressAggregator,
+)
+from ska_tango_examples.teams.long_running.ResultRouter import ResultRouter
 
 
 class StationComponentManager(TaskExecutorComponentManager):
+    # the progress is reported at most once every this many seconds
+    PROGRESS_INTERVAL = 0.5
+
     def __init__(
         self,
         device,
@@ -33,41 +44,84 @@ class StationComponentManager(TaskExecutorComponentManager):
             power=PowerState.UNKNOWN,
         )
 
-        self.tile_on_cmds = {}
-        self.tile_off_cmds = {}
-
-    def get_tile_proxies(self):
-        return [tango.DeviceProxy(tile) for tile in self.tiles]
+        self.tile_on_cmds = CompletionLatch()
+        self.tile_off_cmds = CompletionLatch()
+        self.tile_on_progress = ProgressAggregator()
+        self.tile_off_progress = ProgressAggregator()
+        self._router = ResultRouter(self.logger)
+        self._dev_factory = DevFactory()
+        self._tile_names = None
+
+    def get_tile_names(self):
+        # the proxies are built in parallel once, and reused until the
+        # tiles change
+        tiles = tuple(self.tiles)
+        if tiles != self._tile_names:
+            self._dev_factory.release()
+            concurrent.futures.wait(self._dev_factory.warm_up(tiles).values())
+            self._tile_names = tiles
+        return tiles
+
+    def _queue_tile_command(self, tile_name, command_name):
+        # a tile that cannot be reached fails its command like a tile
+        # refusing it; a tile is subscribed to once, on its first command
+        try:
+            tile = self._dev_factory.get_device(tile_name)
+            self._router.subscribe([tile])
+            return tile.command_inout(command_name)
+        except tango.DevFailed as df:
+            self.logger.error(
+                "Tile %s %s failed: %s", tile_name, command_name, df
+            )
+            return [ResultCode.FAILED], [str(df)]
 
-    def _wait_for_event(self, tile_events: dict, timeout: int = 5):
-        while timeout > 0:
-            if all(tile_events.values()):
-                return True
-            timeout -= 1
-            time.sleep(1)
+    def _wait_for_event(self, tile_events: CompletionLatch, timeout=5):
+        if tile_events.wait(timeout):
+            self.logger.debug(
+                "Tile commands completed at %s", tile_events.timestamps()
+            )
+            return True
+        self.logger.error(
+            "Tile commands not completed: %s", tile_events.pending
+        )
+        self._drop_routes(tile_events)
         return False
 
-    def tile_on_event(self, event: tango.EventData):
-        if not event.err:
-            id = event.attr_value.value[0]
-            if event.attr_value.value[1]:
-                result = json.loads(event.attr_value.value[1])
-                if id in self.tile_on_cmds and result[0] == int(ResultCode.OK):
-                    self.tile_on_cmds[id] = True
+    def _drop_routes(self, tile_events):
+        for command_id in tile_events.pending_commands:
+            self._router.unroute(command_id)
 
-        return
+    def tile_on_result(self, command_id, result):
+        if result[0] == int(ResultCode.OK):
+            self.tile_on_cmds.complete(command_id)
+            self.tile_on_progress.complete(command_id)
 
-    def tile_off_event(self, event: tango.EventData):
-        if not event.err:
-            id = event.attr_value.value[0]
-            if event.attr_value.value[1]:
-                result = json.loads(event.attr_value.value[1])
-                if id in self.tile_off_cmds and result[0] == int(
-                    ResultCode.OK
-                ):
-                    self.tile_off_cmds[id] = True
+    def tile_off_result(self, command_id, result):
+        if result[0] == int(ResultCode.OK):
+            self.tile_off_cmds.complete(command_id)
+            self.tile_off_progress.complete(command_id)
 
-        return
+    def _progress_aggregator(self, task_callback):
+        # the progress of the station is the mean progress of its tiles
+        def report(progress):
+            task_callback(progress=progress)
+
+        return ProgressAggregator(
+            report if task_callback else None,
+            min_interval=self.PROGRESS_INTERVAL,
+        )
+
+    def subscriptions(self):
+        """Return the number of tiles subscribed to."""
+        return len(self._router)
+
+    def unsubscribe(self):
+        """Drop the subscriptions to the tiles."""
+        self._router.unsubscribe()
+
+    def release(self):
+        """Release the proxies of the tiles."""
+        self._dev_factory.release()
 
     def wait_for_tiles_on(self, timeout=5):
         return self._wait_for_event(self.tile_on_cmds, timeout=timeout)
@@ -94,25 +148,27 @@ class StationComponentManager(TaskExecutorComponentManager):
         ] = None,  # pylint: disable=unused-argument
     ):
         """"""
-        self.tile_on_cmds = {}
-        tiles = self.get_tile_proxies()
-        for tile in tiles:
-            tile.subscribe_event(
-                "longRunningCommandResult",
-                tango.EventType.CHANGE_EVENT,
-                self.tile_on_event,
-            )
-            return_code, id_or_msg = tile.On()
+        self.tile_on_cmds = CompletionLatch()
+        self.tile_on_progress = self._progress_aggregator(task_callback)
+        for tile in self.get_tile_names():
+            return_code, id_or_msg = self._queue_tile_command(tile, "On")
             if return_code[0] == ResultCode.QUEUED:
-                self.tile_on_cmds[id_or_msg[0]] = False
+                self.tile_on_cmds.add(id_or_msg[0], tile)
+                self.tile_on_progress.add(id_or_msg[0])
+                self._router.route(
+                    id_or_msg[0],
+                    self.tile_on_result,
+                    self.tile_on_progress.update,
+                )
             else:
                 if task_callback:
                     result = (
                         ResultCode.FAILED,
-                        f"Could not turn tile {tile.name()} on",
+                        f"Could not turn tile {tile} on",
                     )
                     if task_callback is not None:
                         task_callback(result=result)
+                self._drop_routes(self.tile_on_cmds)
                 return
 
         if self.wait_for_tiles_on(timeout=16):
@@ -148,25 +204,27 @@ class StationComponentManager(TaskExecutorComponentManager):
         ] = None,  # pylint: disable=unused-argument
     ):
         """"""
-        self.tile_off_cmds = {}
-        tiles = self.get_tile_proxies()
-        for tile in tiles:
-            tile.subscribe_event(
-                "longRunningCommandResult",
-                tango.EventType.CHANGE_EVENT,
-                self.tile_off_event,
-            )
-            return_code, id_or_msg = tile.Off()
+        self.tile_off_cmds = CompletionLatch()
+        self.tile_off_progress = self._progress_aggregator(task_callback)
+        for tile in self.get_tile_names():
+            return_code, id_or_msg = self._queue_tile_command(tile, "Off")
             if return_code[0] == ResultCode.QUEUED:
-                self.tile_off_cmds[id_or_msg[0]] = False
+                self.tile_off_cmds.add(id_or_msg[0], tile)
+                self.tile_off_progress.add(id_or_msg[0])
+                self._router.route(
+                    id_or_msg[0],
+                    self.tile_off_result,
+                    self.tile_off_progress.update,
+                )
             else:
                 if task_callback:
                     result = (
                         ResultCode.FAILED,
-                        f"Could not turn tile {tile.name()} off",
+                        f"Could not turn tile {tile} off",
                     )
                     if task_callback is not None:
                         task_callback(result=result)
+                self._drop_routes(self.tile_off_cmds)
                 return
 
         if self.wait_for_tiles_off(timeout=16):
@@ -229,6 +287,15 @@ class Station(SKABaseDevice):
             ),
         )
 
+    def delete_device(self):
+        self.component_manager.unsubscribe()
+        self.component_manager.release()
+        super().delete_device()
+
+    @attribute(dtype="DevLong", doc="Number of tiles subscribed to")
+    def childSubscriptions(self):
+        return self.component_manager.subscriptions()
+
     def create_component_manager(self):
         return StationComponentManager(
             self,
@@ -24,13 +24,24 @@ class TileComponentManager(TaskExecutorComponentManager):
         self.device = device
         super().__init__(*args, logger=logger, **kwargs)
 
-    def lr_on(self):
+    # a switch lasts this many seconds, reported in this many steps
+    SWITCH_TIME = 4
+    SWITCH_STEPS = 8
+
+    def _switch(self, task_callback=None):
+        for step in range(1, self.SWITCH_STEPS + 1):
+            time.sleep(self.SWITCH_TIME / self.SWITCH_STEPS)
+            if task_callback:
+                # Progress is a percentage
+                task_callback(progress=int(100 * step / self.SWITCH_STEPS))
+
+    def lr_on(self, task_callback=None):
         # Switching on takes long
-        time.sleep(4)
+        self._switch(task_callback)
 
-    def lr_off(self):
+    def lr_off(self, task_callback=None):
         # Switching off takes long
-        time.sleep(4)
+        self._switch(task_callback)
 
     def on(
         self,
@@ -49,7 +60,7 @@ class TileComponentManager(TaskExecutorComponentManager):
         ] = None,  # pylint: disable=unused-argument
     ):
         """"""
-        self.lr_on()
+        self.lr_on(task_callback)
         result = (ResultCode.OK, "On completed")
         if task_callback:
             task_callback(status=TaskStatus.COMPLETED, result=result)
@@ -72,7 +83,7 @@ class TileComponentManager(TaskExecutorComponentManager):
         ] = None,  # pylint: disable=unused-argument
     ):
         """"""
-        self.lr_off()
+        self.lr_off(task_callback)
         result = (ResultCode.OK, "Off completed")
         if task_callback:
             task_callback(status=TaskStatus.COMPLETED, result=result)
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmark of the Counter and AsyncCounter devices.
+
+Each device class is started in its own MultiDeviceTestContext, so that no
+TANGO database or other external service is needed. For a growing number
+of client threads, every client sends the same number of commands to the
+device and the benchmark measures:
+
+- the commands per second served by the device
+- the p50 and p99 latency of a command, as seen by the client
+- the change events per second received by a subscriber
+
+Every command pushes a change event: the clients alternate increment and
+decrement, so that the value stays between zero and the number of
+clients, and every one of these values is a threshold of the counter.
+
+The results are written as JSON, so that they can be compared between
+releases::
+
+    make python-benchmark
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import threading
+import time
+
+import numpy
+import tango
+from tango.test_context import MultiDeviceTestContext
+
+from ska_tango_examples.counter.AsyncCounter import AsyncCounter
+from ska_tango_examples.counter.Counter import Counter
+
+DEVICE_NAME = "test/counter/benchmark"
+DEFAULT_CLIENTS = (1, 2, 4, 8, 16)
+DEFAULT_COMMANDS = 1000
+EVENT_TIMEOUT = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+def run_clients(device_access, clients, commands):
+    """
+    Send commands to the device from many client threads
+
+    :param device_access: the TANGO access string of the device
+    :param clients: the number of client threads
+    :param commands: the number of commands sent by each client
+
+    :return: tuple (elapsed time in seconds, list of latencies in seconds)
+    """
+    latencies = [[] for _ in range(clients)]
+    barrier = threading.Barrier(clients + 1)
+    errors = []
+
+    def client(index):
+        with tango.EnsureOmniThread():
+            try:
+                proxy = tango.DeviceProxy(device_access)
+                proxy.ping()
+            finally:
+                barrier.wait()
+            timings = latencies[index]
+            try:
+                for count in range(commands):
+                    method = proxy.decrement if count % 2 else proxy.increment
+                    start = time.perf_counter()
+                    method()
+                    timings.append(time.perf_counter() - start)
+            except tango.DevFailed as df:
+                errors.append(df)
+
+    threads = [
+        threading.Thread(target=client, args=(index,))
+        for index in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return elapsed, [latency for timings in latencies for latency in timings]
+
+
+def measure(context, clients, commands):
+    """
+    Measure the device of a running context for a number of clients
+
+    :return: dict with the results of the run
+    """
+    proxy = context.get_device(DEVICE_NAME)
+    proxy.Init()
+    proxy.thresholds = list(range(clients + 1))
+
+    events = []
+
+    def on_event(evt):
+        if not evt.err:
+            events.append(time.perf_counter())
+
+    event_id = proxy.subscribe_event(
+        "value", tango.EventType.CHANGE_EVENT, on_event
+    )
+    # discard the event sent on subscription
+    deadline = time.monotonic() + EVENT_TIMEOUT
+    while not events and time.monotonic() < deadline:
+        time.sleep(0.01)
+    events.clear()
+
+    start = time.perf_counter()
+    elapsed, latencies = run_clients(
+        context.get_device_access(DEVICE_NAME), clients, commands
+    )
+    expected = clients * commands
+    deadline = time.monotonic() + EVENT_TIMEOUT
+    while len(events) < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    proxy.unsubscribe_event(event_id)
+
+    received = len(events)
+    events_elapsed = events[-1] - start if received else 0.0
+    p50, p99 = numpy.percentile(latencies, [50, 99])
+    return {
+        "clients": clients,
+        "commands": len(latencies),
+        "elapsed_s": elapsed,
+        "commands_per_second": len(latencies) / elapsed,
+        "latency_p50_ms": p50 * 1000,
+        "latency_p99_ms": p99 * 1000,
+        "events": received,
+        "events_per_second": (
+            received / events_elapsed if events_elapsed else 0.0
+        ),
+    }
+
+
+def benchmark(
+    device_class, clients=DEFAULT_CLIENTS, commands=DEFAULT_COMMANDS
+):
+    """
+    Run the benchmark for a device class
+
+    :param device_class: Counter or AsyncCounter
+    :param clients: the numbers of client threads to measure
+    :param commands: the number of commands sent by each client
+
+    :return: list of the results, one for each number of clients
+    """
+    devices_info = (
+        {"class": device_class, "devices": [{"name": DEVICE_NAME}]},
+    )
+    results = []
+    # the device logging is turned off, as it would dominate the timings
+    with MultiDeviceTestContext(
+        devices_info, process=True, debug=0
+    ) as context:
+        for count in clients:
+            result = measure(context, count, commands)
+            logger.info(
+                "%s with %d clients: %.0f commands/s, p99 %.2f ms",
+                device_class.__name__,
+                count,
+                result["commands_per_second"],
+                result["latency_p99_ms"],
+            )
+            results.append(
+                {
+                    "device": device_class.__name__,
+                    "green_mode": str(
+                        getattr(
+                            device_class,
+                            "green_mode",
+                            tango.GreenMode.Synchronous,
+                        )
+                    ),
+                    **result,
+                }
+            )
+    return results
+
+
+def main(args=None):
+    """Run the benchmark for both counters and write the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--clients",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_CLIENTS),
+        help="numbers of concurrent clients to measure",
+    )
+    parser.add_argument(
+        "--commands",
+        type=int,
+        default=DEFAULT_COMMANDS,
+        help="number of commands sent by each client",
+    )
+    parser.add_argument(
+        "--output",
+        default="counter-benchmark.json",
+        help="path of the JSON report",
+    )
+    options = parser.parse_args(args)
+
+    report = {
+        "tango_version": tango.__version__,
+        "python_version": platform.python_version(),
+        "commands_per_client": options.commands,
+        "results": [],
+    }
+    for device_class in (Counter, AsyncCounter):
+        report["results"].extend(
+            benchmark(device_class, options.clients, options.commands)
+        )
+
+    # the report is not printed: the device servers share the stdout
+    with open(options.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    # a device server forked from a process where omniORB already runs
+    # may deadlock, so every test context is started in a fresh process
+    multiprocessing.set_start_method("spawn")
+    main()
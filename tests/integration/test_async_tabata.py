@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple integration tests of the AsyncTabata device. The AsyncTabata
+and its counters run in their own device servers, as they would in a
+deployment, so that the events of the counters drive the workout.
+"""
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+import tango
+from tango import DevState
+
+SLEEP_TIME = 0.5
+TIMEOUT = 20
+COUNTERS = {
+    "prepCounter": "test/acounter/prepare",
+    "workCounter": "test/acounter/work",
+    "restCounter": "test/acounter/rest",
+    "cycleCounter": "test/acounter/cycles",
+    "tabatasCounter": "test/acounter/tabatas",
+}
+TABATA = "test/asynctabata/1"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(module, port, *args):
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            module,
+            "test",
+            f"-ORBendPoint=giop:tcp:127.0.0.1:{port}",
+            *args,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_for_device(access):
+    start = time.monotonic()
+    while True:
+        try:
+            proxy = tango.DeviceProxy(access)
+            proxy.ping()
+            return proxy
+        except tango.DevFailed:
+            if time.monotonic() - start > TIMEOUT:
+                raise
+            time.sleep(0.1)
+
+
+@pytest.fixture
+def tabata(tmp_path):
+    """Start the counters, then the AsyncTabata using them"""
+    counters_port = free_port()
+    tabata_port = free_port()
+    lines = [f'AsyncTabata/test/DEVICE/AsyncTabata: "{TABATA}"']
+    for name, device in COUNTERS.items():
+        lines.append(
+            f'{TABATA}->{name}: "tango://127.0.0.1:{counters_port}'
+            f'/{device}#dbase=no"'
+        )
+    lines.append(f"{TABATA}->sleep_time: {SLEEP_TIME}")
+    database = tmp_path / "tabata.db"
+    database.write_text("\n".join(lines) + "\n")
+
+    servers = [
+        start_server(
+            "ska_tango_examples.counter.AsyncCounter",
+            counters_port,
+            "-nodb",
+            "-dlist",
+            ",".join(COUNTERS.values()),
+        )
+    ]
+    try:
+        for device in COUNTERS.values():
+            wait_for_device(
+                f"tango://127.0.0.1:{counters_port}/{device}#dbase=no"
+            )
+        servers.append(
+            start_server(
+                "ska_tango_examples.tabata.AsyncTabata",
+                tabata_port,
+                f"-file={database}",
+            )
+        )
+        proxy = wait_for_device(
+            f"tango://127.0.0.1:{tabata_port}/{TABATA}#dbase=no"
+        )
+        proxy.set_timeout_millis(5000)
+        yield proxy
+    finally:
+        for server in servers:
+            server.kill()
+            server.wait()
+
+
+def setup_tabata(proxy, value):
+    for name in ("prepare", "work", "rest", "cycles", "tabatas"):
+        proxy.write_attribute(name, value)
+    proxy.ResetCounters()
+
+
+def test_workout_runs_to_completion(tabata):
+    setup_tabata(tabata, 1)
+    tabata.Run()
+    start = time.monotonic()
+    while tabata.State() == DevState.ON:
+        if time.monotonic() - start > TIMEOUT:
+            pytest.fail("Timeout occurred while executing the test")
+        time.sleep(0.05)
+    assert tabata.State() == DevState.OFF
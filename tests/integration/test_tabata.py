@@ -93,6 +93,13 @@ def test_sync_tabata(tango_context):
     assert proxy.State() == DevState.ON
     wait_for_events(proxy)
     assert proxy.State() == DevState.OFF
+    # every tick is in the statistics
+    ticks = len(proxy.tick_lateness)
+    assert ticks > 0
+    assert len(proxy.tick_edges) + 1 == len(proxy.tick_lateness_histogram)
+    assert sum(proxy.tick_lateness_histogram) == ticks
+    assert sum(proxy.tick_rpc_histogram) == ticks
+    assert sum(proxy.tick_lock_wait_histogram) == ticks
 
 
 @pytest.mark.post_deployment
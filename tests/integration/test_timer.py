@@ -7,7 +7,9 @@ import logging
 import time
 
 import pytest
+import tango
 from tango import DevState
+from tango.test_utils import DeviceTestContext
 
 from ska_tango_examples.counter.Counter import Counter
 from ska_tango_examples.DevFactory import DevFactory
@@ -33,6 +35,16 @@ def devices_to_load():
                     "name": "test/timer/1",
                     "properties": {"sleep_time": 0.05},
                 },
+                {
+                    "name": "test/timer/2",
+                    "properties": {
+                        "sleep_time": 0.05,
+                        "internalClock": True,
+                        "push_rate": 5,
+                        "minutesCounter": "",
+                        "secondsCounter": "",
+                    },
+                },
             ],
         },
     )
@@ -80,9 +92,57 @@ def test_timer(tango_context):
     proxy = dev_factory.get_device("test/timer/1")
     setup_timer(proxy)
     proxy.ResetCounters()
+    # read from the counters
+    assert (proxy.minutes, proxy.seconds, proxy.remaining) == (1, 5, 65)
     proxy.Start()
     with pytest.raises(Exception):
         proxy.Start()
     assert proxy.State() == DevState.RUNNING
     wait_for_events(proxy)
     assert proxy.State() == DevState.OFF
+    # every tick is in the statistics
+    ticks = len(proxy.tick_lateness)
+    assert ticks > 0
+    assert len(proxy.tick_edges) + 1 == len(proxy.tick_lateness_histogram)
+    assert sum(proxy.tick_lateness_histogram) == ticks
+    assert sum(proxy.tick_rpc_histogram) == ticks
+    assert sum(proxy.tick_lock_wait_histogram) == ticks
+
+
+def test_internal_clock(tango_context):
+    logging.info("%s", tango_context)
+    proxy = DevFactory().get_device("test/timer/2")
+    setup_timer(proxy)
+    proxy.ResetCounters()
+    assert (proxy.minutes, proxy.seconds, proxy.remaining) == (1, 5, 65)
+    proxy.Start()
+    time.sleep(0.5)
+    proxy.Stop()
+    # the countdown stops and resumes where it was
+    remaining = proxy.remaining
+    assert 50 < remaining < 65
+    time.sleep(0.2)
+    assert proxy.remaining == remaining
+    dev_states = []
+    start_time = time.time()
+    proxy.Start()
+    while proxy.State() != DevState.OFF:
+        dev_states.append(proxy.State())
+        if time.time() - start_time > TIMEOUT:
+            pytest.fail("Timeout occurred while executing the test")
+        time.sleep(0.01)
+    assert DevState.ALARM in dev_states
+    assert (proxy.minutes, proxy.seconds, proxy.remaining) == (0, 0, 0)
+    assert sum(proxy.tick_lateness_histogram) > 0
+
+
+def test_push_rate_must_be_positive():
+    properties = {
+        "internalClock": True,
+        "push_rate": 0,
+        "minutesCounter": "",
+        "secondsCounter": "",
+    }
+    with pytest.raises(tango.DevFailed):
+        with DeviceTestContext(Timer, properties=properties):
+            pass
@@ -12,6 +12,7 @@ import tango
 from tango.test_utils import DeviceTestContext
 
 from ska_tango_examples.counter.AsyncCounter import AsyncCounter
+from ska_tango_examples.counter.AtomicCounter import OverflowMode
 
 
 @pytest.fixture
@@ -55,6 +56,68 @@ def test_reset(counter):
     assert counter.value == 1
 
 
+def test_increment_by(counter):
+    counter.Init()
+    assert counter.IncrementBy(10) == 10
+    assert counter.IncrementBy(-3) == 7
+    assert counter.value == 7
+
+
+def test_apply_deltas(counter):
+    counter.Init()
+    values = counter.ApplyDeltas([1, 2, -5])
+    assert list(values) == [1, 3, -2]
+    assert counter.value == -2
+
+
+def test_overflow_mode(counter):
+    counter.Init()
+    assert counter.overflow_mode == OverflowMode.WRAP
+    counter.CounterReset(32767)
+    assert counter.increment() == -32768
+    counter.overflow_mode = OverflowMode.SATURATE
+    counter.CounterReset(32767)
+    assert counter.increment() == 32767
+
+
+def test_events_are_published_in_order(counter):
+    counter.Init()
+    counter.thresholds = [2, 4]
+    received = []
+    event_id = counter.subscribe_event(
+        "value",
+        tango.EventType.CHANGE_EVENT,
+        lambda evt: received.append(evt.attr_value.value),
+    )
+    for _ in range(5):
+        counter.increment()
+    counter.ApplyDeltas([-3, 3])
+    time.sleep(0.5)
+    counter.unsubscribe_event(event_id)
+    # the subscription event, then every crossing in the order it happened,
+    # the first delta crossing 4 and 2 and the second one 4 again
+    assert received == [0, 2, 4, 2, 5]
+    assert list(counter.crossed_thresholds) == [4]
+
+
+def test_queued_crossing_is_not_lost(counter):
+    counter.Init()
+    counter.CounterReset(1)
+    counter.thresholds = [-1]
+    received = []
+    event_id = counter.subscribe_event(
+        "value",
+        tango.EventType.CHANGE_EVENT,
+        lambda evt: received.append(evt.attr_value.value),
+    )
+    # both crossings are queued before the publisher runs
+    counter.ApplyDeltas([-1, -1])
+    time.sleep(0.5)
+    counter.unsubscribe_event(event_id)
+    assert received == [1, 0, -1]
+    assert list(counter.crossed_thresholds) == [-1]
+
+
 @pytest.mark.post_deployment
 def test_polled_value():
     pytest.count = 0
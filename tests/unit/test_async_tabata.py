@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the AsyncTabata device. The AsyncTabata never
+blocks the event loop on its counters, so it can serve them from the very
+same asyncio device server of a MultiDeviceTestContext. The server runs
+in a process of its own, where the events of the counters reach the
+Asyncio proxies of the AsyncTabata and drive the workout.
+"""
+import time
+
+import pytest
+import tango
+from tango import DevState
+from tango.test_context import MultiDeviceTestContext
+
+from ska_tango_examples.counter.AsyncCounter import AsyncCounter
+from ska_tango_examples.tabata.AsyncTabata import AsyncTabata
+
+SLEEP_TIME = 0.5
+TIMEOUT = 20
+COUNTERS = {
+    "prepCounter": "test/acounter/prepare",
+    "workCounter": "test/acounter/work",
+    "restCounter": "test/acounter/rest",
+    "cycleCounter": "test/acounter/cycles",
+    "tabatasCounter": "test/acounter/tabatas",
+}
+TABATA = "test/asynctabata/1"
+
+
+@pytest.fixture()
+def devices_to_load():
+    return (
+        {
+            "class": AsyncTabata,
+            "devices": [
+                {
+                    "name": TABATA,
+                    "properties": {**COUNTERS, "sleep_time": SLEEP_TIME},
+                }
+            ],
+        },
+        {
+            "class": AsyncCounter,
+            "devices": [{"name": name} for name in COUNTERS.values()],
+        },
+    )
+
+
+@pytest.fixture
+def tango_context(devices_to_load):
+    # in the in-thread context of conftest the event callbacks of the
+    # Asyncio proxies are submitted to a loop that never runs
+    with MultiDeviceTestContext(devices_to_load, process=True) as context:
+        yield context
+
+
+@pytest.fixture
+def tabata(tango_context):
+    proxy = tango_context.get_device(TABATA)
+    proxy.set_timeout_millis(5000)
+    return proxy
+
+
+def setup_tabata(proxy, value):
+    for name in ("prepare", "work", "rest", "cycles", "tabatas"):
+        proxy.write_attribute(name, value)
+    proxy.ResetCounters()
+
+
+def test_run_returns_at_once_and_stop_cancels(tabata):
+    setup_tabata(tabata, 100)
+    start = time.monotonic()
+    tabata.Run()
+    assert time.monotonic() - start < SLEEP_TIME
+    assert tabata.State() == DevState.ON
+    with pytest.raises(tango.DevFailed):
+        tabata.Run()
+    time.sleep(SLEEP_TIME / 2)
+    start = time.monotonic()
+    tabata.Stop()
+    # the workout task is cancelled without waiting for the next tick
+    assert time.monotonic() - start < SLEEP_TIME / 2
+    assert tabata.State() == DevState.OFF
+
+
+def test_counters_follow_the_workout(tango_context, tabata):
+    setup_tabata(tabata, 3)
+    for device in COUNTERS.values():
+        assert tango_context.get_device(device).value == 3
+    tabata.Run()
+    prepare = tango_context.get_device(COUNTERS["prepCounter"])
+    start = time.monotonic()
+    while prepare.value == 3:
+        if time.monotonic() - start > TIMEOUT:
+            pytest.fail("Timeout occurred while executing the test")
+        time.sleep(0.05)
+    tabata.Stop()
+    assert tabata.State() == DevState.OFF
+
+
+def wait_for_workout(proxy):
+    start = time.monotonic()
+    while proxy.State() == DevState.ON:
+        if time.monotonic() - start > TIMEOUT:
+            pytest.fail("Timeout occurred while executing the test")
+        time.sleep(0.05)
+
+
+def test_workout_runs_to_completion(tabata):
+    setup_tabata(tabata, 1)
+    tabata.Run()
+    wait_for_workout(tabata)
+    assert tabata.State() == DevState.OFF
+
+
+def test_run_after_a_workout_runs_a_single_loop(tango_context, tabata):
+    setup_tabata(tabata, 1)
+    tabata.Run()
+    wait_for_workout(tabata)
+    # run again while the loop of the finished workout may still sleep
+    setup_tabata(tabata, 100)
+    tabata.Run()
+    prepare = tango_context.get_device(COUNTERS["prepCounter"])
+    start_value = prepare.value
+    time.sleep(6 * SLEEP_TIME)
+    decrements = start_value - prepare.value
+    tabata.Stop()
+    # a second loop left running would decrement twice per tick
+    assert decrements <= 7
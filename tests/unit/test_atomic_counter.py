@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the AtomicCounter used by the Counter devices.
+"""
+import threading
+
+from ska_tango_examples.counter.AtomicCounter import (
+    AtomicCounter,
+    OverflowMode,
+)
+
+
+def test_add_and_set():
+    counter = AtomicCounter()
+    assert counter.add(5) == (0, 5)
+    assert counter.add(-7) == (5, -2)
+    assert counter.set(10) == (-2, 10)
+    assert counter.value == 10
+
+
+def test_wrap():
+    counter = AtomicCounter(AtomicCounter.MAX_VALUE)
+    assert counter.add(1) == (AtomicCounter.MAX_VALUE, AtomicCounter.MIN_VALUE)
+    assert counter.add(-1) == (
+        AtomicCounter.MIN_VALUE,
+        AtomicCounter.MAX_VALUE,
+    )
+
+
+def test_saturate():
+    counter = AtomicCounter(
+        AtomicCounter.MAX_VALUE - 1, overflow_mode=OverflowMode.SATURATE
+    )
+    assert counter.add(10)[1] == AtomicCounter.MAX_VALUE
+    assert counter.add(-(2**20))[1] == AtomicCounter.MIN_VALUE
+
+
+def test_concurrent_updates_are_not_lost():
+    counter = AtomicCounter()
+
+    def hammer():
+        for _ in range(1000):
+            counter.add(1)
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.value == 8000
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the CompletionLatch used by the long running
+command devices to wait for their children.
+"""
+import threading
+import time
+
+from ska_tango_examples.teams.long_running.CompletionLatch import (
+    CompletionLatch,
+)
+
+
+def test_wait_wakes_on_last_completion():
+    latch = CompletionLatch()
+    latch.add("1_On", "test/lrctile/1")
+    latch.add("2_On", "test/lrctile/2")
+    assert latch.pending == ["test/lrctile/1", "test/lrctile/2"]
+    assert not latch.wait(0.05)
+    timer = threading.Timer(0.1, latch.complete, ("2_On",))
+    start = time.monotonic()
+    timer.start()
+    assert latch.complete("1_On")
+    assert not latch.complete("1_On")
+    # the waiter is woken by the completion, long before its timeout
+    assert latch.wait(10)
+    assert time.monotonic() - start < 5
+    timer.join()
+    assert latch.pending == []
+    assert sorted(latch.timestamps()) == ["test/lrctile/1", "test/lrctile/2"]
+
+
+def test_completion_before_add():
+    latch = CompletionLatch()
+    latch.complete("1_On")
+    latch.add("1_On")
+    assert latch.pending == []
+    assert latch.wait(0)
+    assert list(latch.timestamps()) == ["1_On"]
+
+
+def test_empty_latch():
+    assert CompletionLatch().wait(0)
@@ -11,6 +11,7 @@ import pytest
 import tango
 from tango.test_utils import DeviceTestContext
 
+from ska_tango_examples.counter.AtomicCounter import OverflowMode
 from ska_tango_examples.counter.Counter import Counter
 
 
@@ -55,6 +56,80 @@ def test_reset(counter):
     assert counter.value == 1
 
 
+def test_increment_by(counter):
+    counter.Init()
+    assert counter.IncrementBy(10) == 10
+    assert counter.IncrementBy(-3) == 7
+    assert counter.value == 7
+
+
+def test_apply_deltas(counter):
+    counter.Init()
+    values = counter.ApplyDeltas([1, 2, -5])
+    assert list(values) == [1, 3, -2]
+    assert counter.value == -2
+
+
+def test_apply_deltas_events(counter):
+    counter.Init()
+    counter.CounterReset(3)
+    received = []
+    event_id = counter.subscribe_event(
+        "value",
+        tango.EventType.CHANGE_EVENT,
+        lambda evt: received.append(evt.attr_value.value),
+    )
+    counter.ApplyDeltas([-1, -1, -1, -1, 1, 1])
+    counter.CounterReset(2)
+    counter.ApplyDeltas([-1, -1, -1])
+    time.sleep(0.5)
+    counter.unsubscribe_event(event_id)
+    # the subscription event, then one event with the value reached by
+    # each step crossing 0, going down and going up
+    assert received == [3, 0, 0, 0]
+    assert list(counter.crossed_thresholds) == [0]
+
+
+def test_thresholds(counter):
+    counter.Init()
+    counter.fire_event_at = 100
+    counter.thresholds = [5, 10]
+    counter.threshold_ranges = [20, 30]
+    assert list(counter.thresholds) == [5, 10]
+    assert list(counter.threshold_ranges) == [20, 30]
+    received = []
+    event_id = counter.subscribe_event(
+        "value",
+        tango.EventType.CHANGE_EVENT,
+        lambda evt: received.append(evt.attr_value.value),
+    )
+    counter.IncrementBy(25)
+    assert list(counter.crossed_thresholds) == [5, 10, 20]
+    counter.IncrementBy(1)
+    counter.IncrementBy(10)
+    assert list(counter.crossed_thresholds) == [30]
+    time.sleep(0.5)
+    counter.unsubscribe_event(event_id)
+    # the subscription event, then one event for each crossing update
+    assert received == [0, 25, 36]
+
+
+def test_threshold_ranges_must_be_pairs(counter):
+    counter.Init()
+    with pytest.raises(tango.DevFailed):
+        counter.threshold_ranges = [1, 2, 3]
+
+
+def test_overflow_mode(counter):
+    counter.Init()
+    assert counter.overflow_mode == OverflowMode.WRAP
+    counter.CounterReset(32767)
+    assert counter.increment() == -32768
+    counter.overflow_mode = OverflowMode.SATURATE
+    counter.CounterReset(32767)
+    assert counter.increment() == 32767
+
+
 @pytest.mark.post_deployment
 def test_polled_value(counter):
     pytest.count = 0
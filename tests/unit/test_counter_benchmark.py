@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+A smoke test of the counter benchmark, run with a small load so that it
+only checks that the harness works and reports every measure. It starts
+device servers and is marked benchmark, which the default run excludes:
+run it with pytest -m benchmark.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+@pytest.mark.benchmark
+def test_counter_benchmark(tmp_path):
+    report_path = tmp_path / "benchmark.json"
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "tests.benchmark.counter_benchmark",
+            "--clients",
+            "1",
+            "2",
+            "--commands",
+            "20",
+            "--output",
+            str(report_path),
+        ],
+        cwd=ROOT,
+        check=True,
+        timeout=120,
+    )
+    report = json.loads(report_path.read_text())
+    results = report["results"]
+    assert [result["device"] for result in results] == [
+        "Counter",
+        "Counter",
+        "AsyncCounter",
+        "AsyncCounter",
+    ]
+    for result in results:
+        assert result["commands"] == result["clients"] * 20
+        assert result["events"] == result["commands"]
+        assert result["commands_per_second"] > 0
+        assert result["latency_p50_ms"] <= result["latency_p99_ms"]
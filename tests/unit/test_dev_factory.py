@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the ProxyPool behind the DevFactory, using
+fake proxies so that no TANGO device is needed.
+"""
+import asyncio
+
+import pytest
+import tango
+
+from ska_tango_examples.DevFactory import DevFactory, ProxyPool
+
+
+class FakeProxy:
+    def __init__(self, name, alive=True, green_mode=None):
+        self.name = name
+        self.alive = alive
+        self.green_mode = green_mode
+
+    def set_green_mode(self, green_mode):
+        self.green_mode = green_mode
+
+    def get_timeout_millis(self):
+        return 3000
+
+    def ping(self, green_mode=None):
+        if not self.alive:
+            raise tango.DevFailed()
+        return 1
+
+    def read_attributes_asynch(self, attr_names, green_mode=None):
+        if not self.alive:
+            raise tango.DevFailed()
+        return list(attr_names)
+
+    def read_attributes_reply(self, request_id, timeout=None):
+        return [FakeAttribute(name, len(name)) for name in request_id]
+
+    def command_inout_asynch(self, cmd_name, *args):
+        if not self.alive:
+            raise tango.DevFailed()
+        return (cmd_name, args)
+
+    def command_inout_reply(self, request_id, timeout=None):
+        cmd_name, args = request_id
+        if cmd_name == "Fail":
+            raise tango.DevFailed()
+        return args[0] if args else None
+
+
+class FakeAttribute:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+
+def test_pool_hit_and_miss():
+    pool = ProxyPool(max_size=2)
+    first = pool.get("a", lambda: FakeProxy("a"))
+    assert pool.get("a", lambda: FakeProxy("other")) is first
+    stats = pool.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_pool_lru_eviction():
+    pool = ProxyPool(max_size=2)
+    pool.get("a", lambda: FakeProxy("a"))
+    pool.get("b", lambda: FakeProxy("b"))
+    # touch "a" so that "b" becomes the least recently used
+    pool.get("a", lambda: FakeProxy("a"))
+    pool.get("c", lambda: FakeProxy("c"))
+    assert "a" in pool
+    assert "b" not in pool
+    assert "c" in pool
+    assert pool.stats()["evictions"] == 1
+
+
+def test_pool_reconnects_dead_proxy():
+    pool = ProxyPool(max_size=2, ttl=0)
+    first = pool.get("a", lambda: FakeProxy("a"))
+    first.alive = False
+    second = pool.get("a", lambda: FakeProxy("a"))
+    assert second is not first
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_pool_invalid_size():
+    with pytest.raises(ValueError):
+        ProxyPool(max_size=0)
+
+
+def test_pool_does_not_evict_acquired_proxies():
+    pool = ProxyPool(max_size=1)
+    pool.get("a", lambda: FakeProxy("a"), acquire=True)
+    pool.get("b", lambda: FakeProxy("b"))
+    assert "a" in pool
+    assert "b" not in pool
+    pool.release("a")
+    pool.get("c", lambda: FakeProxy("c"))
+    assert "a" not in pool
+
+
+@pytest.fixture
+def shared_pool(monkeypatch):
+    monkeypatch.setattr(DevFactory, "_test_context", None)
+    monkeypatch.setattr(DevFactory, "pool", ProxyPool())
+    monkeypatch.setattr(tango, "DeviceProxy", FakeProxy)
+    return DevFactory.pool
+
+
+def test_configure_pool(shared_pool):
+    factory = DevFactory()
+    factory.get_device("test/counter/1")
+    for name in ("test/counter/2", "test/counter/3"):
+        DevFactory.pool.get(name, lambda: FakeProxy(name))
+    DevFactory.configure_pool(max_size=1, ttl=5.0)
+    stats = factory.stats()
+    assert stats["max_size"] == 1
+    # the acquired proxy is kept, the others are evicted
+    assert stats["size"] == 1
+    assert stats["evictions"] == 2
+    assert shared_pool.ttl == 5.0
+    DevFactory.configure_pool(ttl=1.0)
+    assert shared_pool.max_size == 1
+    with pytest.raises(ValueError):
+        DevFactory.configure_pool(max_size=0)
+
+
+def test_factories_share_proxies(shared_pool):
+    first_factory = DevFactory()
+    second_factory = DevFactory()
+    proxy = first_factory.get_device("test/counter/1")
+    assert second_factory.get_device("Test/Counter/1") is proxy
+    assert first_factory.get_device("test/counter/1") is proxy
+    key = ("test/counter/1", tango.GreenMode.Synchronous)
+    assert shared_pool.refs(key) == 2
+    first_factory.release()
+    second_factory.release()
+    assert shared_pool.refs(key) == 0
+
+
+def test_factory_keys_on_green_mode(shared_pool):
+    factory = DevFactory()
+    sync_proxy = factory.get_device("test/counter/1")
+    async_proxy = factory.get_device("test/counter/1", tango.GreenMode.Asyncio)
+    assert sync_proxy is not async_proxy
+    assert async_proxy.green_mode == tango.GreenMode.Asyncio
+
+
+def test_factory_green_mode_in_test_context(shared_pool, monkeypatch):
+    class FakeContext:
+        def __init__(self):
+            self.proxy = FakeProxy(
+                "shared", green_mode=tango.GreenMode.Synchronous
+            )
+
+        def get_device(self, dev_name):
+            return self.proxy
+
+        def get_device_access(self, dev_name):
+            return f"tango://localhost:1234/{dev_name}#dbase=no"
+
+    context = FakeContext()
+    monkeypatch.setattr(DevFactory, "_test_context", context)
+    factory = DevFactory()
+    async_proxy = factory.get_device("test/counter/1", tango.GreenMode.Asyncio)
+    sync_proxy = factory.get_device("test/counter/1")
+    assert async_proxy is not sync_proxy
+    assert async_proxy.green_mode == tango.GreenMode.Asyncio
+    assert sync_proxy.green_mode == tango.GreenMode.Synchronous
+    assert async_proxy.name == "tango://localhost:1234/test/counter/1#dbase=no"
+    assert factory.get_device("test/counter/1") is sync_proxy
+    # the proxy of the test context is left untouched
+    assert context.proxy.green_mode == tango.GreenMode.Synchronous
+    assert factory.warm_up(["test/counter/1"]) == {}
+
+
+def test_factory_warm_up(shared_pool):
+    factory = DevFactory()
+    futures = factory.warm_up(["test/counter/1", "test/counter/2"])
+    proxies = {name: future.result() for name, future in futures.items()}
+    assert factory.get_device("test/counter/1") is proxies["test/counter/1"]
+    assert factory.get_device("test/counter/2") is proxies["test/counter/2"]
+    assert shared_pool.stats()["misses"] == 2
+
+
+def test_factory_warm_up_asyncio(shared_pool):
+    factory = DevFactory(green_mode=tango.GreenMode.Asyncio)
+
+    async def warm_up():
+        futures = factory.warm_up(["test/counter/1"])
+        return await asyncio.gather(*futures.values())
+
+    (proxy,) = asyncio.run(warm_up())
+    assert proxy.green_mode == tango.GreenMode.Asyncio
+    assert factory.get_device("test/counter/1") is proxy
+
+
+def test_factory_read_attributes(shared_pool):
+    factory = DevFactory()
+    factory.get_device("test/counter/2").alive = False
+    results = factory.read_attributes(
+        {
+            "test/counter/1": ["value", "polled_value"],
+            "test/counter/2": ["value"],
+        }
+    )
+    assert results["test/counter/1"] == {"value": 5, "polled_value": 12}
+    assert isinstance(results["test/counter/2"], tango.DevFailed)
+
+
+def test_factory_command_inout(shared_pool):
+    factory = DevFactory()
+    factory.get_device("test/counter/2").alive = False
+    results = factory.command_inout(
+        {
+            "test/counter/1": ("CounterReset", 3),
+            "test/counter/2": ("CounterReset", 3),
+            "test/counter/3": ("Fail", None),
+            "test/counter/4": ("increment", None),
+        }
+    )
+    assert list(results) == [
+        "test/counter/1",
+        "test/counter/2",
+        "test/counter/3",
+        "test/counter/4",
+    ]
+    assert results["test/counter/1"] == 3
+    assert isinstance(results["test/counter/2"], tango.DevFailed)
+    assert isinstance(results["test/counter/3"], tango.DevFailed)
+    assert results["test/counter/4"] is None
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the EventDispatcher, using fake proxies and
+events so that no TANGO device is needed.
+"""
+import asyncio
+
+import tango
+
+from ska_tango_examples.EventDispatcher import EventDispatcher
+
+
+class FakeProxy:
+    def __init__(self):
+        self.subscriptions = []
+
+    def subscribe_event(self, attr_name, event_type, callback, **kwargs):
+        self.subscriptions.append((attr_name, event_type, callback, kwargs))
+        return len(self.subscriptions)
+
+    def push(self, evt):
+        for _, _, callback, _ in self.subscriptions:
+            callback(evt)
+
+
+class FakeEvent:
+    def __init__(self, value=None, err=False):
+        self.value = value
+        self.err = err
+        self.errors = [tango.DevError()] if err else []
+
+
+def test_events_reach_their_handler():
+    dispatcher = EventDispatcher()
+    first, second = FakeProxy(), FakeProxy()
+    received = []
+    assert (
+        dispatcher.subscribe(
+            first, "value", lambda evt: received.append(("first", evt.value))
+        )
+        == 1
+    )
+    dispatcher.subscribe(
+        second,
+        "value",
+        lambda evt: received.append(("second", evt.value)),
+        stateless=True,
+    )
+    assert second.subscriptions[0][1] == tango.EventType.CHANGE_EVENT
+    assert second.subscriptions[0][3] == {"stateless": True}
+    second.push(FakeEvent(3))
+    first.push(FakeEvent(1))
+    assert received == [("second", 3), ("first", 1)]
+
+
+def test_errors_reach_the_error_handler():
+    errors = []
+    dispatcher = EventDispatcher(error_handler=errors.append)
+    proxy = FakeProxy()
+    received = []
+    dispatcher.subscribe(proxy, "value", received.append)
+    error = FakeEvent(err=True)
+    proxy.push(error)
+    assert received == []
+    assert errors == [error]
+    # the default error handler only logs
+    EventDispatcher().callback(received.append)(error)
+    assert received == []
+
+
+def test_coroutine_handler():
+    received = []
+
+    async def handler(evt):
+        received.append(evt.value)
+
+    callback = EventDispatcher().callback(handler)
+    asyncio.run(callback(FakeEvent(5)))
+    assert received == [5]
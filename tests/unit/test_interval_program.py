@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the IntervalProgram and of the
+ProgramStateMachine running it.
+"""
+import json
+
+import pytest
+
+from ska_tango_examples.tabata.IntervalProgram import (
+    IntervalProgram,
+    ProgramStateMachine,
+)
+from ska_tango_examples.tabata.RunningState import RunningState
+from ska_tango_examples.tabata.TabataStateMachine import TabataStateMachine
+
+PREPARE, WORK, REST = (
+    RunningState.PREPARE,
+    RunningState.WORK,
+    RunningState.REST,
+)
+
+
+def run_program(machine):
+    states = []
+    while not machine.done:
+        states.append(machine.running_state)
+        machine.tick()
+    return states
+
+
+def test_compile():
+    program = IntervalProgram.from_json(
+        json.dumps(
+            {
+                "phases": [
+                    {"state": "PREPARE", "duration": 2},
+                    {
+                        "repeat": 2,
+                        "phases": [
+                            {"state": "WORK", "duration": 3},
+                            {
+                                "repeat": 2,
+                                "phases": [{"state": "REST", "duration": 1}],
+                            },
+                        ],
+                    },
+                    {"state": "WORK", "duration": 0},
+                ]
+            }
+        )
+    )
+    # the repeats are unrolled and the empty phase dropped
+    assert program.timeline.tolist() == [
+        [PREPARE, 0],
+        [WORK, 2],
+        [REST, 5],
+        [REST, 6],
+        [WORK, 7],
+        [REST, 10],
+        [REST, 11],
+    ]
+    assert program.total_ticks == 12
+    assert program.phase_at(6) == REST
+    assert program.phase_at(12) == PREPARE
+
+
+def test_tabata_program():
+    machine = TabataStateMachine(
+        prepare=2, work=3, rest=1, cycles=2, tabatas=2
+    )
+    program = IntervalProgram.tabata(2, 3, 1, 2, 2)
+    assert program.total_ticks == machine.total_ticks
+    states = run_program(machine)
+    assert [program.phase_at(tick) for tick in range(len(states))] == states
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "not json",
+        "{}",
+        "[]",
+        '[{"state": "SLEEP", "duration": 1}]',
+        '[{"state": "WORK", "duration": -1}]',
+        '[{"state": "WORK", "duration": 0}]',
+        '[{"repeat": 0, "phases": [{"state": "WORK", "duration": 1}]}]',
+        '[{"repeat": 100000, "phases": [{"state": "WORK", "duration": 1}]}]',
+    ],
+)
+def test_invalid_programs(text):
+    with pytest.raises(ValueError):
+        IntervalProgram.from_json(text)
+
+
+def test_program_state_machine():
+    program = IntervalProgram.from_json(
+        '[{"state": "WORK", "duration": 2}, {"state": "REST", "duration": 1},'
+        ' {"state": "WORK", "duration": 1}]'
+    )
+    machine = ProgramStateMachine(program)
+    assert machine.values == {"prepare": 0, "work": 2, "rest": 0}
+    assert machine.tick() == {"work": 1}
+    # the counter of the next phase starts with the ticks of the phase
+    assert machine.tick() == {"work": 0, "rest": 1}
+    assert machine.tick() == {"rest": 0, "work": 1}
+    assert not machine.done
+    assert machine.tick() == {"work": 0}
+    assert machine.done
+    assert machine.running_state == PREPARE
+    assert machine.remaining_ticks() == 0
+    machine.reset()
+    assert run_program(machine) == [WORK, WORK, REST, WORK]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the ProgressAggregator used by the long
+running command devices to report the progress of their children.
+"""
+from ska_tango_examples.teams.long_running.ProgressAggregator import (
+    ProgressAggregator,
+)
+
+
+def test_weighted_progress():
+    reported = []
+    progress = ProgressAggregator(
+        reported.append, start=50, span=50, min_interval=0
+    )
+    assert progress.value == 50
+    progress.add("1_On", weight=3)
+    progress.add("2_On")
+    progress.update("1_On", 50)
+    assert progress.value == 68
+    progress.update("2_On", 100)
+    assert progress.value == 81
+    # a progress never goes back, and an unknown command is ignored
+    progress.update("1_On", 40)
+    progress.update("3_On", 100)
+    assert progress.value == 77
+    progress.complete("1_On")
+    assert progress.value == 100
+    assert reported == [68, 81, 100]
+
+
+def test_reports_are_rate_limited():
+    reported = []
+    progress = ProgressAggregator(reported.append, min_interval=60)
+    for tile in range(4):
+        progress.add(tile)
+    for step in range(1, 11):
+        for tile in range(4):
+            progress.update(tile, 10 * step)
+    # the first report and the last one only
+    assert reported == [2, 100]
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the ResultRouter used by the long running
+command devices, using fake proxies and events so that no TANGO device
+is needed.
+"""
+import json
+
+import tango
+
+from ska_tango_examples.teams.long_running.ResultRouter import ResultRouter
+
+
+class FakeProxy:
+    def __init__(self, name):
+        self.name = name
+        self.callbacks = {}
+        self.subscribed = 0
+
+    def dev_name(self):
+        return self.name
+
+    def subscribe_event(self, attr_name, event_type, callback):
+        assert event_type == tango.EventType.CHANGE_EVENT
+        self.subscribed += 1
+        self.callbacks[self.subscribed] = (attr_name, callback)
+        # a subscription always produces a first event
+        if attr_name == "longRunningCommandResult":
+            callback(FakeEvent("", ""))
+        else:
+            callback(FakeProgressEvent(()))
+        return self.subscribed
+
+    def unsubscribe_event(self, event_id):
+        del self.callbacks[event_id]
+
+    def push(self, command_id, result):
+        for attr_name, callback in list(self.callbacks.values()):
+            if attr_name == "longRunningCommandResult":
+                callback(FakeEvent(command_id, json.dumps(result)))
+
+    def push_progress(self, progress):
+        for attr_name, callback in list(self.callbacks.values()):
+            if attr_name == "longRunningCommandProgress":
+                callback(FakeProgressEvent(progress))
+
+
+class FakeAttrValue:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeEvent:
+    def __init__(self, command_id, result, err=False):
+        self.err = err
+        self.attr_value = FakeAttrValue((command_id, result))
+
+
+class FakeProgressEvent:
+    def __init__(self, progress):
+        self.err = False
+        self.attr_value = FakeAttrValue(progress)
+
+
+def test_one_subscription_per_child():
+    router = ResultRouter()
+    tiles = [FakeProxy("test/lrctile/1"), FakeProxy("test/lrctile/2")]
+    router.subscribe(tiles)
+    router.subscribe(tiles)
+    router.subscribe(tiles[:1])
+    assert len(router) == 2
+    # one subscription to the result and one to the progress
+    assert [tile.subscribed for tile in tiles] == [2, 2]
+    router.unsubscribe()
+    assert len(router) == 0
+    assert [tile.callbacks for tile in tiles] == [{}, {}]
+
+
+def test_results_are_routed_by_command_id():
+    router = ResultRouter()
+    tile = FakeProxy("test/lrctile/1")
+    router.subscribe([tile])
+    received = []
+    router.route("1_On", lambda *args: received.append(("on", *args)))
+    router.route("2_Off", lambda *args: received.append(("off", *args)))
+    assert router.stats() == {
+        "subscriptions": 1,
+        "routes": 2,
+        "progress_routes": 0,
+        "unrouted": 0,
+    }
+    tile.push("2_Off", [0, "Off completed"])
+    tile.push("1_On", [0, "On completed"])
+    # a route is used once
+    tile.push("1_On", [0, "On completed"])
+    assert received == [
+        ("off", "2_Off", [0, "Off completed"]),
+        ("on", "1_On", [0, "On completed"]),
+    ]
+    assert router.stats()["routes"] == 0
+
+
+def test_result_before_route():
+    router = ResultRouter()
+    tile = FakeProxy("test/lrctile/1")
+    router.subscribe([tile])
+    tile.push("1_On", [0, "On completed"])
+    assert router.stats()["unrouted"] == 1
+    received = []
+    router.route("1_On", lambda *args: received.append(args))
+    assert received == [("1_On", [0, "On completed"])]
+    router.route("2_On", received.append)
+    router.unroute("2_On")
+    tile.push("2_On", [0, "On completed"])
+    assert len(received) == 1
+
+
+def test_progress_is_routed_until_the_result():
+    router = ResultRouter()
+    tile = FakeProxy("test/lrctile/1")
+    router.subscribe([tile])
+    progress = []
+    router.route(
+        "1_On", lambda *args: None, lambda *args: progress.append(args)
+    )
+    tile.push_progress(("0_Off", "100", "1_On", "25"))
+    tile.push_progress(("1_On", "50"))
+    tile.push("1_On", [0, "On completed"])
+    tile.push_progress(("1_On", "100"))
+    assert progress == [("1_On", 25), ("1_On", 50)]
@@ -9,6 +9,7 @@ import pytest
 
 from ska_tango_examples.counter.Counter import Counter
 from ska_tango_examples.DevFactory import DevFactory
+from ska_tango_examples.tabata.RunningState import RunningState
 from ska_tango_examples.tabata.Tabata import Tabata
 
 
@@ -65,3 +66,94 @@ def test_set_attr(tango_context):
     dev_factory = DevFactory()
     proxy = dev_factory.get_device("test/tabata/1")
     check_set_attr(proxy)
+
+
+def test_timeline(tango_context):
+    logging.info("%s", tango_context)
+    dev_factory = DevFactory()
+    proxy = dev_factory.get_device("test/tabata/1")
+    proxy.prepare = 2
+    proxy.work = 3
+    proxy.rest = 1
+    proxy.cycles = 2
+    proxy.tabatas = 1
+    proxy.ResetCounters()
+    prepare, work, rest = (
+        RunningState.PREPARE,
+        RunningState.WORK,
+        RunningState.REST,
+    )
+    assert list(proxy.timeline) == [
+        prepare,
+        0,
+        work,
+        2,
+        rest,
+        5,
+        work,
+        6,
+        rest,
+        9,
+    ]
+    # the default sleep time is one second per tick
+    assert proxy.remaining_time == 10
+
+
+def test_program(tango_context):
+    logging.info("%s", tango_context)
+    dev_factory = DevFactory()
+    proxy = dev_factory.get_device("test/tabata/1")
+    with pytest.raises(Exception):
+        proxy.program = '[{"state": "SLEEP", "duration": 1}]'
+    proxy.program = (
+        '[{"repeat": 2, "phases": [{"state": "WORK", "duration": 3},'
+        ' {"state": "REST", "duration": 2}]}]'
+    )
+    proxy.ResetCounters()
+    assert list(proxy.timeline) == [
+        RunningState.WORK,
+        0,
+        RunningState.REST,
+        3,
+        RunningState.WORK,
+        5,
+        RunningState.REST,
+        8,
+    ]
+    assert proxy.running_state == RunningState.WORK
+    # the counters mirror the ticks left in the current phase
+    assert dev_factory.get_device("test/counter/work").value == 3
+    assert proxy.remaining_time == 10
+    proxy.program = ""
+    proxy.ResetCounters()
+    assert len(proxy.timeline) == 2 * (1 + 2 * 8)
+
+
+def test_start_runs_written_program(tango_context):
+    logging.info("%s", tango_context)
+    dev_factory = DevFactory()
+    proxy = dev_factory.get_device("test/tabata/1")
+    proxy.program = '[{"state": "REST", "duration": 5}]'
+    proxy.Start()
+    try:
+        assert proxy.running_state == RunningState.REST
+        assert len(proxy.timeline) == 2
+    finally:
+        proxy.Stop()
+
+
+def test_long_workout(tango_context):
+    logging.info("%s", tango_context)
+    dev_factory = DevFactory()
+    proxy = dev_factory.get_device("test/tabata/1")
+    proxy.cycles = 200
+    proxy.tabatas = 200
+    proxy.ResetCounters()
+    assert proxy.remaining_time == 10 + 200 * 200 * 30
+    # the timeline only is too long to be laid out
+    with pytest.raises(Exception):
+        proxy.timeline
+    with pytest.raises(Exception):
+        proxy.program = (
+            '[{"repeat": 40000, "phases": [{"state": "WORK", "duration": 1}]}]'
+        )
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the TabataPool device, exercising the device from
+the same host as the tests by using a DeviceTestContext.
+"""
+import time
+
+import pytest
+import tango
+from tango import DevState
+from tango.test_utils import DeviceTestContext
+
+from ska_tango_examples.tabata.RunningState import RunningState
+from ska_tango_examples.tabata.TabataPool import TabataPool
+
+TIMEOUT = 10
+
+
+@pytest.fixture
+def tabata_pool():
+    """Create DeviceProxy for tests"""
+    properties = {"sleep_time": 0.01, "wheel_resolution": 0.002}
+    with DeviceTestContext(TabataPool, properties=properties) as proxy:
+        yield proxy
+
+
+def wait_for_sessions(proxy):
+    start_time = time.time()
+    while proxy.running_sessions:
+        if time.time() - start_time > TIMEOUT:
+            pytest.fail("Timeout occurred while executing the test")
+        time.sleep(0.01)
+
+
+def test_sessions_run_to_completion(tabata_pool):
+    ids = [tabata_pool.AddSession([2, 3, 2, 2, 1]) for _ in range(50)]
+    assert tabata_pool.sessions == 50
+    assert tabata_pool.State() == DevState.OFF
+    for session in ids:
+        tabata_pool.StartSession(session)
+    assert tabata_pool.State() == DevState.ON
+    with pytest.raises(tango.DevFailed):
+        tabata_pool.StartSession(ids[0])
+    wait_for_sessions(tabata_pool)
+    assert tabata_pool.State() == DevState.OFF
+    for session in ids:
+        assert list(tabata_pool.GetSession(session)) == [
+            RunningState.PREPARE,
+            0,
+            2,
+            3,
+            2,
+            2,
+            0,
+        ]
+
+
+def test_stop_and_reset(tabata_pool):
+    session = tabata_pool.AddSession([100, 20, 10, 8, 1])
+    tabata_pool.StartSession(session)
+    time.sleep(0.1)
+    tabata_pool.StopSession(session)
+    state = list(tabata_pool.GetSession(session))
+    assert state[:2] == [RunningState.PREPARE, 0]
+    assert state[2] < 100
+    time.sleep(0.1)
+    assert list(tabata_pool.GetSession(session)) == state
+    tabata_pool.ResetSession(session)
+    assert list(tabata_pool.GetSession(session))[2] == 100
+    tabata_pool.RemoveSession(session)
+    assert tabata_pool.sessions == 0
+    with pytest.raises(tango.DevFailed):
+        tabata_pool.StartSession(session)
+
+
+def test_max_sessions_is_bounded():
+    # the session_ids and running_states spectrums could not be read
+    properties = {"max_sessions": TabataPool.MAX_SESSIONS + 1}
+    with pytest.raises(tango.DevFailed):
+        with DeviceTestContext(TabataPool, properties=properties):
+            pass
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the TabataSessions arrays of the TabataPool.
+"""
+import numpy
+import pytest
+
+from ska_tango_examples.tabata.TabataSessions import TabataSessions
+from ska_tango_examples.tabata.TabataStateMachine import TabataStateMachine
+
+CONFIGS = [(2, 3, 1, 2, 1), (0, 1, 2, 1, 2), (1, 1, 1, 3, 2)]
+
+
+def test_sessions_follow_the_state_machine():
+    sessions = TabataSessions(8)
+    ids = [sessions.add(config) for config in CONFIGS]
+    machines = [TabataStateMachine(*config) for config in CONFIGS]
+    sessions.running[ids] = True
+    while sessions.running.any():
+        running = numpy.flatnonzero(sessions.running)
+        sessions.tick(running)
+        for session in running:
+            machines[session].tick()
+        for session, machine in zip(ids, machines):
+            assert sessions.running_state[session] == machine.running_state
+            assert list(sessions.values[session]) == [
+                machine.values[name] for name in machine.COUNTERS
+            ]
+            assert sessions.done[session] == machine.done
+
+
+def test_add_and_remove():
+    sessions = TabataSessions(2)
+    first = sessions.add(CONFIGS[0])
+    second = sessions.add(CONFIGS[1])
+    assert len(sessions) == 2
+    with pytest.raises(ValueError):
+        sessions.add(CONFIGS[2])
+    sessions.remove(first)
+    assert list(sessions.ids()) == [second]
+    assert sessions.add(CONFIGS[2]) == first
+    with pytest.raises(ValueError):
+        sessions.check(5)
+
+
+def test_invalid_config():
+    sessions = TabataSessions(2)
+    with pytest.raises(ValueError):
+        sessions.add((1, 0, 1, 1, 1))
+    with pytest.raises(ValueError):
+        sessions.add((1, 1, 1))
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the TabataStateMachine driving the Tabata device.
+"""
+import pytest
+
+from ska_tango_examples.tabata.RunningState import RunningState
+from ska_tango_examples.tabata.TabataStateMachine import TabataStateMachine
+
+
+def run_workout(machine):
+    states = []
+    while not machine.done:
+        states.append(machine.running_state)
+        machine.tick()
+    return states
+
+
+def test_phases():
+    machine = TabataStateMachine(
+        prepare=2, work=3, rest=1, cycles=2, tabatas=1
+    )
+    states = run_workout(machine)
+    prepare, work, rest = (
+        RunningState.PREPARE,
+        RunningState.WORK,
+        RunningState.REST,
+    )
+    assert states == [prepare] * 2 + ([work] * 3 + [rest]) * 2
+    assert machine.ticks == machine.total_ticks == 10
+    assert machine.running_state == RunningState.PREPARE
+    assert machine.values == {
+        "prepare": 2,
+        "work": 3,
+        "rest": 1,
+        "cycles": 2,
+        "tabatas": 0,
+    }
+    assert machine.tick() == {}
+
+
+def test_tick_updates():
+    machine = TabataStateMachine(
+        prepare=1, work=1, rest=1, cycles=1, tabatas=2
+    )
+    # the end of a phase resets its counter
+    assert machine.tick() == {"prepare": 1}
+    assert machine.tick() == {"work": 1}
+    # the end of the last rest of a tabata ends the cycle
+    assert machine.tick() == {"rest": 1, "cycles": 1, "tabatas": 1}
+    assert not machine.done
+    machine.tick()
+    assert machine.tick() == {"rest": 1, "cycles": 1, "tabatas": 0}
+    assert machine.done
+
+
+def test_no_prepare():
+    machine = TabataStateMachine(
+        prepare=0, work=2, rest=2, cycles=1, tabatas=1
+    )
+    assert machine.running_state == RunningState.WORK
+    assert RunningState.PREPARE not in run_workout(machine)
+    assert machine.ticks == machine.total_ticks == 4
+
+
+def test_reset():
+    machine = TabataStateMachine(
+        prepare=1, work=1, rest=1, cycles=1, tabatas=1
+    )
+    run_workout(machine)
+    machine.reset()
+    assert not machine.done
+    assert machine.ticks == 0
+    assert machine.values["tabatas"] == 1
+
+
+def test_timeline():
+    machine = TabataStateMachine(
+        prepare=2, work=3, rest=1, cycles=2, tabatas=1
+    )
+    prepare, work, rest = (
+        RunningState.PREPARE,
+        RunningState.WORK,
+        RunningState.REST,
+    )
+    assert machine.timeline.tolist() == [
+        [prepare, 0],
+        [work, 2],
+        [rest, 5],
+        [work, 6],
+        [rest, 9],
+    ]
+    # the timeline agrees with the ticks of the machine
+    for ticks, state in enumerate(run_workout(machine)):
+        assert machine.phase_at(ticks) == state
+        assert machine.remaining_ticks(ticks) == 10 - ticks
+    assert machine.phase_at(10) == prepare
+    assert machine.remaining_ticks() == 0
+
+
+def test_timeline_without_prepare():
+    machine = TabataStateMachine(
+        prepare=0, work=2, rest=2, cycles=1, tabatas=2
+    )
+    assert machine.timeline[:, 1].tolist() == [0, 2, 4, 6]
+    assert machine.phase_at(0) == RunningState.WORK
+    assert machine.phase_at(3) == RunningState.REST
+
+
+def test_long_workout():
+    machine = TabataStateMachine(
+        prepare=10, work=20, rest=10, cycles=200, tabatas=200
+    )
+    assert machine.total_ticks == 10 + 200 * 200 * 30
+    assert machine.phase_at(9) == RunningState.PREPARE
+    assert machine.phase_at(10 + 30 * 39999 + 19) == RunningState.WORK
+    assert machine.phase_at(10 + 30 * 39999 + 20) == RunningState.REST
+    assert machine.phase_at(machine.total_ticks) == RunningState.PREPARE
+    # the workout runs, only its timeline is too long to be laid out
+    with pytest.raises(ValueError):
+        machine.timeline
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the ThresholdIndex used by the Counter devices.
+"""
+import pytest
+
+from ska_tango_examples.counter.ThresholdIndex import ThresholdIndex
+
+
+def test_crossed_thresholds():
+    index = ThresholdIndex(thresholds=[10, 0, 5])
+    assert index.crossed(-1, 10) == [0, 5, 10]
+    assert index.crossed(11, 0) == [10, 5, 0]
+    # the old value is excluded, the new one included
+    assert index.crossed(0, 4) == []
+    assert index.crossed(4, 5) == [5]
+    assert index.crossed(7, 7) == []
+
+
+def test_crossed_ranges():
+    index = ThresholdIndex(ranges=[(20, 30)])
+    assert index.crossed(0, 25) == [20]
+    assert index.crossed(25, 40) == [30]
+    assert index.crossed(40, 25) == [30]
+    assert index.crossed(25, 0) == [20]
+    # moving inside the range does not cross anything
+    assert index.crossed(20, 30) == []
+    assert index.crossed(0, 40) == [20, 30]
+
+
+def test_crossed_by_deltas():
+    index = ThresholdIndex(thresholds=[0, 5])
+    # only the steps crossing a level are returned, with their value
+    assert index.crossed_by_deltas(2, [-1, -1, -1], [1, 0, -1]) == [(0, [0])]
+    assert index.crossed_by_deltas(-1, [10, -10], [9, -1]) == [
+        (9, [0, 5]),
+        (-1, [5, 0]),
+    ]
+    # the steps are taken unbounded, so that wrapping around does not
+    # look like crossing the whole range
+    assert index.crossed_by_deltas(32767, [1], [-32768]) == []
+
+
+def test_on_level():
+    index = ThresholdIndex(thresholds=[3], ranges=[(10, 12)])
+    assert len(index) == 2
+    assert index.on_level(3)
+    assert index.on_level(12)
+    assert not index.on_level(11)
+
+
+def test_invalid_range():
+    with pytest.raises(ValueError):
+        ThresholdIndex(ranges=[(5, 1)])
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the TickStatistics ring buffer.
+"""
+import pytest
+
+from ska_tango_examples.TickStatistics import TickStatistics
+
+
+def test_samples_oldest_first():
+    statistics = TickStatistics(size=3)
+    assert len(statistics) == 0
+    assert statistics.samples("lateness").tolist() == []
+    for tick in range(5):
+        statistics.record(tick, rpc=tick * 10, lock_wait=tick * 100)
+    # only the last size ticks are kept
+    assert len(statistics) == 3
+    assert statistics.samples("lateness").tolist() == [2, 3, 4]
+    assert statistics.samples("rpc").tolist() == [20, 30, 40]
+    assert statistics.samples("lock_wait").tolist() == [200, 300, 400]
+
+
+def test_histogram():
+    statistics = TickStatistics(edges=(0.01, 0.1))
+    for lateness in (-0.001, 0.005, 0.01, 0.05, 0.5, 2.0):
+        statistics.record(lateness)
+    assert statistics.histogram("lateness").tolist() == [3, 1, 2]
+    assert statistics.histogram("rpc").tolist() == [6, 0, 0]
+
+
+def test_invalid_statistics():
+    with pytest.raises(ValueError):
+        TickStatistics(size=0)
+    with pytest.raises(ValueError):
+        TickStatistics().samples("drift")
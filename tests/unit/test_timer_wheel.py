@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Some simple unit tests of the TimerWheel driving the TabataPool device.
+"""
+import random
+
+import pytest
+
+from ska_tango_examples.tabata.TimerWheel import TimerWheel
+
+
+def test_expire_in_order():
+    wheel = TimerWheel(slots=4, levels=2)
+    wheel.schedule("b", 3)
+    wheel.schedule("a", 1)
+    wheel.schedule("c", 3)
+    assert len(wheel) == 3
+    assert wheel.advance(2) == ["a"]
+    assert sorted(wheel.advance(3)) == ["b", "c"]
+    assert len(wheel) == 0
+
+
+def test_cancel_and_reschedule():
+    wheel = TimerWheel(slots=4, levels=2)
+    wheel.schedule("a", 5)
+    wheel.schedule("b", 6)
+    wheel.cancel("a")
+    wheel.schedule("b", 10)
+    assert "a" not in wheel
+    assert wheel.deadline("b") == 10
+    assert wheel.advance(9) == []
+    assert wheel.advance(10) == ["b"]
+
+
+def test_past_deadline_expires_next_tick():
+    wheel = TimerWheel()
+    wheel.advance(100)
+    wheel.schedule("a", 50)
+    assert wheel.advance(101) == ["a"]
+
+
+@pytest.mark.parametrize("slots, levels", [(2, 1), (4, 2), (8, 3), (64, 4)])
+def test_timers_expire_on_their_deadline(slots, levels):
+    generator = random.Random(slots * levels)
+    wheel = TimerWheel(slots=slots, levels=levels)
+    deadlines = {key: generator.randint(1, 5000) for key in range(200)}
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline)
+    now = 0
+    while len(wheel):
+        step = generator.randint(1, 40)
+        for key in wheel.advance(now + step):
+            assert now < deadlines[key] <= now + step
+        now += step
+
+
+def test_invalid_wheel():
+    with pytest.raises(ValueError):
+        TimerWheel(slots=1)